@@ -10,8 +10,12 @@ from services.weather_service import WeatherService
 from services.itinerary_engine import ItineraryEngine
 from database import init_database, seed_sample_data, get_venue_count
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+try:
+    from services.shared import get_venue_service, get_weather_service, get_itinerary_engine
+except ImportError:
+    # Streamlit not installed - construct services directly
+    get_venue_service, get_weather_service, get_itinerary_engine = VenueService, WeatherService, ItineraryEngine
+
 logger = logging.getLogger('debug_test')
 
 def test_itinerary_generation():
@@ -22,7 +26,7 @@ def test_itinerary_generation():
     logger.info("Initializing database...")
     init_database()
     seed_sample_data()
-    logger.info(f"Database has {get_venue_count()} venues")
+    logger.info("Database has %d venues", get_venue_count())
     
     # Create test preferences
     logger.info("Creating test user preferences...")
@@ -34,41 +38,43 @@ def test_itinerary_generation():
         trip_duration=2,
         transportation_preference=["mtr", "taxi"]
     )
-    logger.info(f"Test preferences: {preferences}")
+    logger.info("Test preferences: %s", preferences)
     
     # Initialize services
     logger.info("Initializing services...")
-    venue_service = VenueService()
-    weather_service = WeatherService()
-    itinerary_engine = ItineraryEngine()
+    venue_service = get_venue_service()
+    weather_service = get_weather_service()
+    itinerary_engine = get_itinerary_engine()
     
     # Test venue service
     logger.info("Testing venue service...")
     all_venues = venue_service.get_all_venues()
-    logger.info(f"Found {len(all_venues)} total venues")
+    logger.info("Found %d total venues", len(all_venues))
     for venue in all_venues:
-        logger.info(f"  - {venue.name} ({venue.category.value})")
+        logger.info("  - %s (%s)", venue.name, venue.category.value)
     
     # Test weather service
     logger.info("Testing weather service...")
     weather = weather_service.get_current_weather()
-    logger.info(f"Weather: {weather}")
+    logger.info("Weather: %s", weather)
     
     # Test itinerary generation
     logger.info("Testing itinerary generation...")
     try:
         itinerary = itinerary_engine.generate_itinerary(preferences, weather)
-        logger.info(f"SUCCESS: Generated itinerary with {len(itinerary.day_plans)} days")
-        logger.info(f"Total cost: {itinerary.total_cost}")
-        logger.info(f"Accessibility score: {itinerary.accessibility_score}")
+        logger.info("SUCCESS: Generated itinerary with %d days", len(itinerary.day_plans))
+        logger.info("Total cost: %s", itinerary.total_cost)
+        logger.info("Accessibility score: %s", itinerary.accessibility_score)
         
         for day_plan in itinerary.day_plans:
-            logger.info(f"Day {day_plan.day}: {len(day_plan.venues)} venues")
+            logger.info("Day %d: %d venues", day_plan.day, len(day_plan.venues))
             for venue in day_plan.venues:
-                logger.info(f"  - {venue.name}")
+                logger.info("  - %s", venue.name)
                 
     except Exception as e:
-        logger.error(f"FAILED: {str(e)}", exc_info=True)
+        logger.error("FAILED: %s", e, exc_info=True)
 
 if __name__ == "__main__":
+    # Configure logging only when run as a script, not on import
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     test_itinerary_generation()
\ No newline at end of file
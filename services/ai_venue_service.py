@@ -3,44 +3,702 @@ AI-Powered Venue Service for Hong Kong Trip Planner
 Uses LLM API to generate dynamic, contextual venue recommendations
 """
 
+import asyncio
+import atexit
+import copy
+import functools
+import hashlib
+import importlib.util
+import json
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+import os
+import re
+import string
+import threading
+import numpy as np
+from typing import Any, AsyncIterator, Coroutine, Iterator, List, Dict, Optional, Tuple
 from models import Venue, VenueCategory, Location, AccessibilityInfo, DietaryOption, WeatherSuitability
+from services.cache import DiskCache, create_cache, default_disk_cache_path
 
 # Optional import for OpenAI
 try:
     import openai
+    import httpx
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
     openai = None
+    httpx = None
+
+# Optional import for faster JSON parsing/serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# Optional import for faster cache-key hashing
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
 
 # Configure logging
 logger = logging.getLogger('services.ai_venue_service')
 
+# Static system prompt; kept byte-identical across requests so providers
+# with prompt caching can reuse the processed prefix
+_SYSTEM_PROMPT = """You are a Hong Kong tourism expert. Recommend accessible venues for families and seniors.
+
+List 3-5 Hong Kong venues with these details:
+1. Victoria Peak (accessible viewing area)
+2. Dim Sum Restaurant (wheelchair accessible)  
+3. Hong Kong Museum (senior-friendly)
+4. Accessible Shopping Mall
+5. MTR Station (barrier-free)
+
+For each venue, mention:
+- Name and type (attraction/restaurant/museum/park/shopping/transport)
+- District location
+- Accessibility features (wheelchair, elevator, toilets)
+- Cost range in HKD
+- Why it's good for seniors/families
+
+Focus on real Hong Kong locations that are wheelchair accessible and senior-friendly.
+
+Respond with a JSON array of venue objects with keys: name, category, district, address, phone, opening_hours, description, cost_range [min, max], latitude, longitude,
+accessibility {wheelchair_accessible, has_elevator, accessible_toilets, step_free_access, notes},
+dietary_options {soft_meals, vegetarian, halal, no_seafood, notes}, weather_suitability (indoor/outdoor/mixed), elderly_friendly."""
+
+_ENHANCEMENT_SYSTEM_PROMPT = "You are a Hong Kong tourism expert specializing in accessible travel."
+
+def _build_system_messages(text: str) -> Tuple[Dict, Dict]:
+    """Build the (plain, prompt-cacheable) system message pair for a static prompt"""
+    return (
+        {"role": "system", "content": text},
+        {"role": "system", "content": [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]}
+    )
+
+# System messages are built once and shared by every request
+_VENUE_SYSTEM_MESSAGES = _build_system_messages(_SYSTEM_PROMPT)
+_ENHANCEMENT_SYSTEM_MESSAGES = _build_system_messages(_ENHANCEMENT_SYSTEM_PROMPT)
+
+# Venue fields the LLM must supply, and the categories the planner understands
+_REQUIRED_VENUE_FIELDS = ('name', 'category', 'description')
+_VALID_CATEGORIES = frozenset(('attraction', 'restaurant', 'transport', 'museum', 'park', 'shopping'))
+
+# Most common preference buckets, pre-generated by warm_cache so early
+# requests hit the exact or semantic cache instead of waiting on the LLM
+_WARM_CACHE_BUCKETS = [
+    {
+        'family_composition': {'adults': 2, 'children': children, 'seniors': seniors},
+        'mobility_needs': mobility,
+        'dietary_restrictions': dietary,
+        'budget_range': (200, 800),
+        'trip_duration': 3
+    }
+    for children, seniors in ((0, 1), (0, 0), (1, 0), (2, 0), (1, 1))
+    for mobility in (['wheelchair'], [])
+    for dietary in (['soft_meals'], [])
+]
+
+# Concurrent LLM requests while warming the cache
+_WARM_CACHE_CONCURRENCY = 4
+
+# Longest a request waits on an identical in-flight one before making its own
+# (seconds); matches the HTTP read timeout of one completion
+_INFLIGHT_WAIT_TIMEOUT = 120.0
+
+# Hong Kong bounding box (lat_min, lat_max, lng_min, lng_max) and the
+# default position for venues outside it
+_HK_BOUNDS = (22.1, 22.6, 113.8, 114.5)
+_HK_DEFAULT_COORDS = (22.3, 114.2)
+
+def _to_float(value) -> float:
+    """Coerce a coordinate to float, NaN if it isn't numeric"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def _reset_coordinates_outside_hk(venues: List[Dict]):
+    """Move venues with out-of-range or non-numeric coordinates to the default position
+    
+    The bounds check runs as one vectorized comparison over the whole batch.
+    """
+    if not venues:
+        return
+    
+    default_lat, default_lng = _HK_DEFAULT_COORDS
+    coords = np.array([
+        (_to_float(v.get('latitude', default_lat)), _to_float(v.get('longitude', default_lng)))
+        for v in venues
+    ])
+    lat_min, lat_max, lng_min, lng_max = _HK_BOUNDS
+    inside = (
+        (coords[:, 0] >= lat_min) & (coords[:, 0] <= lat_max)
+        & (coords[:, 1] >= lng_min) & (coords[:, 1] <= lng_max)
+    )
+    # NaN compares False, so non-numeric coordinates are reset too
+    for index in np.flatnonzero(~inside):
+        venues[index]['latitude'] = default_lat
+        venues[index]['longitude'] = default_lng
+
+# Venues per enhancement call; structured output keeps larger batches parseable
+_ENHANCEMENT_BATCH_SIZE = 20
+
+# Output cap for one micro-batched venue completion
+_BATCH_MAX_TOKENS = 8000
+
+# Enhancement batches in flight at once
+_ENHANCEMENT_CONCURRENCY = 4
+
+# OpenAI structured-output schema for venue enhancements
+_ENHANCEMENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "venue_enhancements",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "enhancements": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "description": {"type": "string"},
+                            "tips": {"type": "array", "items": {"type": "string"}}
+                        },
+                        "required": ["name", "description", "tips"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["enhancements"],
+            "additionalProperties": False
+        }
+    }
+}
+
+def _strict_object(properties: Dict) -> Dict:
+    """Strict-mode JSON schema object: every property required, no extras"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+_BOOLEAN_SCHEMA = {"type": "boolean"}
+_NOTES_SCHEMA = {"type": "array", "items": {"type": "string"}}
+
+# OpenAI structured-output schema for generated venues; strict mode needs an
+# object root, and the stream parser picks the array out of it as usual. The
+# properties are the keys VenueService reads (address, phone and opening_hours
+# included), so nothing is lost in the conversion to Venue.
+_VENUE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "venues",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "venues": {
+                    "type": "array",
+                    "items": _strict_object({
+                        "name": {"type": "string"},
+                        "category": {"type": "string", "enum": sorted(_VALID_CATEGORIES)},
+                        "district": {"type": "string"},
+                        "address": {"type": "string"},
+                        "phone": {"type": "string"},
+                        "opening_hours": {"type": "string"},
+                        "description": {"type": "string"},
+                        "cost_range": {"type": "array", "items": {"type": "number"}},
+                        "latitude": {"type": "number"},
+                        "longitude": {"type": "number"},
+                        "accessibility": _strict_object({
+                            "wheelchair_accessible": _BOOLEAN_SCHEMA,
+                            "has_elevator": _BOOLEAN_SCHEMA,
+                            "accessible_toilets": _BOOLEAN_SCHEMA,
+                            "step_free_access": _BOOLEAN_SCHEMA,
+                            "notes": _NOTES_SCHEMA
+                        }),
+                        "dietary_options": _strict_object({
+                            "soft_meals": _BOOLEAN_SCHEMA,
+                            "vegetarian": _BOOLEAN_SCHEMA,
+                            "halal": _BOOLEAN_SCHEMA,
+                            "no_seafood": _BOOLEAN_SCHEMA,
+                            "notes": _NOTES_SCHEMA
+                        }),
+                        "weather_suitability": {"type": "string", "enum": ["indoor", "mixed", "outdoor"]},
+                        "elderly_friendly": _BOOLEAN_SCHEMA
+                    })
+                }
+            },
+            "required": ["venues"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Venue name patterns for smart text extraction, compiled once
+_VENUE_NAME_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'"name":\s*"([^"]+)"',  # JSON format
+    r"'name':\s*'([^']+)'",  # JSON with single quotes
+    r'\d+\.\s*([A-Z][^0-9\n]+?)(?=\s*\d+\.|$)',  # Numbered lists
+    r'##?\s*([A-Z][^\n]+)',  # Markdown headers
+    r'-\s*([A-Z][^\n-]+)',   # Bullet points
+    r'•\s*([A-Z][^\n•]+)',   # Bullet points with bullet
+    r'(?:^|\n)([A-Z][^:\n]+(?:Restaurant|Museum|Park|Market|Temple|Peak|Ferry|Station|Centre|Center|Plaza|Square|Tower|Building|Mall|Gallery))',  # Lines starting with venue names
+)]
+
+# Light JSON repairs for near-valid LLM output
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_UNQUOTED_KEY_RE = re.compile(r'([{,]\s*)([A-Za-z_]\w*)\s*:')
+
+# Endpoint errors that blame the structured-output request itself
+_RESPONSE_FORMAT_ERROR_RE = re.compile(r'response_format|json_schema|structured output', re.IGNORECASE)
+
+# Characters that change state while scanning streamed JSON
+_JSON_STRUCTURE_RE = re.compile(r'[\[{}"\\]')
+
+# Free-text enhancement replies: a venue header line ("...venue/attraction/
+# restaurant...:") and, within its section, the lines that are tips
+_ENHANCEMENT_HEADER_RE = re.compile(
+    r'^[^\S\n]*(?=[^\n]*(?:venue|attraction|restaurant))([^:\n]*):[^\n]*$', re.IGNORECASE | re.MULTILINE
+)
+_ENHANCEMENT_TIP_RE = re.compile(
+    r'^[^\S\n]*([^\n]*?(?:accessibility|tip)[^\n]*?)[^\S\n]*$', re.IGNORECASE | re.MULTILINE
+)
+
+def _json_loads(data):
+    """Parse JSON text or bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _canonical_json(obj) -> bytes:
+    """Serialize to key-order-independent JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, sort_keys=True, default=str).encode()
+
+# User prompt for venue generation, filled with a single substitute() call
+_VENUE_PROMPT_TEMPLATE = string.Template("""Generate $count Hong Kong venues for a $duration-day trip:
+
+Family: $adults adults, $children children, $seniors seniors
+Budget: HKD $budget_min-$budget_max per person per day
+Accessibility needs: $mobility
+Dietary needs: $dietary
+$weather
+
+Include mix of attractions, restaurants, and transport. Focus on accessibility and senior-friendly options.""")
+
+def _venue_count(duration: int) -> int:
+    """Number of venues a prompt asks for on a trip of the given length"""
+    return min(duration * 3, 10)
+
+def _build_venue_prompt(preferences: Dict, weather_data: Dict = None) -> str:
+    """Create contextual prompt for venue generation"""
+    family_comp = preferences.get('family_composition', {})
+    mobility_needs = preferences.get('mobility_needs', [])
+    dietary_restrictions = preferences.get('dietary_restrictions', [])
+    budget_range = preferences.get('budget_range', (200, 800))
+    duration = preferences.get('trip_duration', 3)
+    
+    weather_context = ""
+    if weather_data:
+        temp = weather_data.get('temperature', 25)
+        rainfall = weather_data.get('rainfall_probability', 20)
+        weather_context = f"Current weather: {temp}°C, {rainfall}% rain chance. "
+    
+    return _VENUE_PROMPT_TEMPLATE.substitute(
+        count=_venue_count(duration),
+        duration=duration,
+        adults=family_comp.get('adults', 2),
+        children=family_comp.get('children', 0),
+        seniors=family_comp.get('seniors', 0),
+        budget_min=budget_range[0],
+        budget_max=budget_range[1],
+        mobility=', '.join(mobility_needs) if mobility_needs else 'None',
+        dietary=', '.join(dietary_restrictions) if dietary_restrictions else 'None',
+        weather=weather_context
+    )
+
+@functools.lru_cache(maxsize=256)
+def _venue_prompt_for_payload(payload: bytes) -> str:
+    """Venue prompt memoized on the canonical [preferences, weather] JSON, which also feeds the cache key"""
+    preferences, weather_data = _json_loads(payload)
+    return _build_venue_prompt(preferences, weather_data)
+
+def _hash_payload(payload: bytes) -> str:
+    """128-bit hex digest of a canonical request payload"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(payload)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+class _VenueStreamParser:
+    """Incremental scanner that yields venue objects from a streamed JSON array
+    
+    Tracks brace depth (ignoring braces inside strings) so each top-level
+    object is parsed as soon as its closing brace arrives. A compiled regex
+    jumps between structural characters, so ordinary text is skipped in C.
+    """
+    
+    def __init__(self):
+        self.buffer = ''
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped_pos = -1  # index of the character escaped by a backslash
+        self._obj_start = None
+    
+    def feed(self, text: str) -> List[Dict]:
+        """Append streamed text and return the objects completed by it"""
+        self.buffer += text
+        objects = []
+        buffer = self.buffer
+        
+        for match in _JSON_STRUCTURE_RE.finditer(buffer, self._pos):
+            i = match.start()
+            char = match.group()
+            if not self._in_array:
+                self._in_array = char == '['
+            elif self._in_string:
+                if i == self._escaped_pos:
+                    continue
+                if char == '\\':
+                    self._escaped_pos = i + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif char == '}' and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = _loads_repaired(buffer[self._obj_start:i + 1])
+                    if isinstance(obj, dict):
+                        objects.append(obj)
+        
+        self._pos = len(buffer)
+        return objects
+
+def _loads_repaired(text: str) -> Any:
+    """Parse JSON, retrying once with light repairs; None if still invalid"""
+    try:
+        return _json_loads(text)
+    except ValueError:
+        # One repair pass: drop trailing commas and quote bare keys
+        repaired = _UNQUOTED_KEY_RE.sub(r'\1"\2":', _TRAILING_COMMA_RE.sub(r'\1', text))
+        try:
+            return _json_loads(repaired)
+        except ValueError:
+            return None
+
+# All AI client coroutines run on one background event loop so the async
+# client's connections stay bound to a single loop across calls
+_event_loop = None
+_init_lock = threading.Lock()
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get (starting on first use) the background loop for AI requests"""
+    global _event_loop
+    with _init_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name='ai-venue-loop', daemon=True).start()
+    return _event_loop
+
+def _run_sync(coro: Coroutine) -> Any:
+    """Run a coroutine on the background loop and block until it completes"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+def _iter_sync(agen: AsyncIterator) -> Iterator:
+    """Drive an async generator on the background loop, yielding items as they arrive"""
+    async def anext_item():
+        try:
+            return True, await agen.__anext__()
+        except StopAsyncIteration:
+            return False, None
+    
+    try:
+        while True:
+            has_item, item = _run_sync(anext_item())
+            if not has_item:
+                return
+            yield item
+    finally:
+        # Runs the generator's cleanup even when the caller stops early
+        _run_sync(agen.aclose())
+
+# Process-wide pooled HTTP client shared by every AI client instance, so
+# repeated requests reuse open connections instead of new TCP/TLS handshakes
+_http_client = None
+
+def _get_http_client() -> 'httpx.AsyncClient':
+    """Get (creating on first use) the shared pooled HTTP client"""
+    global _http_client
+    with _init_lock:
+        if _http_client is None:
+            _http_client = httpx.AsyncClient(
+                # HTTP/2 needs the optional h2 package
+                http2=importlib.util.find_spec('h2') is not None,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=90.0),
+                # Long completions can take a while to finish; connects should not
+                timeout=httpx.Timeout(120.0, connect=10.0)
+            )
+            atexit.register(_close_http_client)
+    return _http_client
+
+def _close_http_client():
+    """Close the shared HTTP client at interpreter exit"""
+    try:
+        _run_sync(_http_client.aclose())
+    except Exception:
+        pass
+
+class SemanticVenueCache:
+    """Preference-level cache for AI venue recommendations
+    
+    Keys on a bucketed signature of the user-facing preferences instead of the
+    exact prompt text, so requests the LLM would answer with an equivalent list
+    (e.g. 24°C vs 25°C, 3 vs 4 adults) share one entry.
+    
+    Requests that land just across a bucket boundary fall back to a
+    nearest-neighbour search over scaled numeric preference vectors. Only
+    entries with identical categorical needs (mobility, dietary, children,
+    seniors) and the same requested venue count are candidates, so an
+    accessibility requirement is never traded for a near miss and a longer
+    trip never gets a shorter trip's list.
+    """
+    
+    # Scaled Euclidean distance under which a cached entry counts as similar;
+    # 1.0 is one bucket step in a single dimension, and the bound is strict so
+    # a full step away (e.g. a 600 vs 800 budget cap) is never similar
+    SIMILARITY_RADIUS = 1.0
+    
+    def __init__(self, profile: str = 'default'):
+        """Initialize cache from a named size/lifetime preset"""
+        self._entries = create_cache(profile)
+        # partition -> (signatures, feature matrix with one row per signature);
+        # bounded like the entries so rarely used need combinations age out
+        self._index = create_cache(profile)
+    
+    @staticmethod
+    def signature(preferences: Dict, weather_data: Dict = None) -> str:
+        """Build canonical signature of the preferences that shape recommendations"""
+        family_comp = preferences.get('family_composition', {})
+        adults = family_comp.get('adults', 2)
+        budget_range = preferences.get('budget_range', (200, 800))
+        duration = preferences.get('trip_duration', 3)
+        
+        parts = [
+            'adults:small' if adults <= 2 else 'adults:medium' if adults <= 4 else 'adults:large',
+            f"children:{family_comp.get('children', 0) > 0}",
+            f"seniors:{family_comp.get('seniors', 0) > 0}",
+            f"budget:{budget_range[0] // 200}-{budget_range[1] // 200}",
+            # Prompts ask for min(duration * 3, 10) venues, so 4+ days look alike
+            f"days:{min(duration, 4)}",
+            f"mobility:{','.join(sorted(preferences.get('mobility_needs', [])))}",
+            f"dietary:{','.join(sorted(preferences.get('dietary_restrictions', [])))}",
+        ]
+        
+        if weather_data:
+            rainfall = weather_data.get('rainfall_probability', 20)
+            parts.append(f"temp:{int(weather_data.get('temperature', 25)) // 5}")
+            parts.append('rain:low' if rainfall < 30 else 'rain:medium' if rainfall < 60 else 'rain:high')
+        
+        return '|'.join(parts)
+    
+    @staticmethod
+    def features(preferences: Dict, weather_data: Dict = None) -> Tuple[str, np.ndarray]:
+        """Split preferences into a categorical partition key and a scaled numeric vector
+        
+        Each dimension is divided by its signature bucket width, so distances
+        are measured in bucket steps.
+        """
+        family_comp = preferences.get('family_composition', {})
+        budget_range = preferences.get('budget_range', (200, 800))
+        
+        partition = '|'.join([
+            f"venues:{_venue_count(preferences.get('trip_duration', 3))}",
+            f"children:{family_comp.get('children', 0) > 0}",
+            f"seniors:{family_comp.get('seniors', 0) > 0}",
+            f"mobility:{','.join(sorted(preferences.get('mobility_needs', [])))}",
+            f"dietary:{','.join(sorted(preferences.get('dietary_restrictions', [])))}",
+            f"weather:{bool(weather_data)}",
+        ])
+        
+        values = [
+            family_comp.get('adults', 2) / 2,
+            budget_range[0] / 200,
+            budget_range[1] / 200,
+        ]
+        if weather_data:
+            values.append(weather_data.get('temperature', 25) / 5)
+            values.append(weather_data.get('rainfall_probability', 20) / 30)
+        
+        return partition, np.array(values, dtype=float)
+    
+    def get(self, signature: str) -> Optional[List[Dict]]:
+        """Get cached venues for a signature if still valid"""
+        return self._entries.get(signature)
+    
+    def get_similar(self, preferences: Dict, weather_data: Dict = None) -> Optional[List[Dict]]:
+        """Get cached venues for the nearest live entry within SIMILARITY_RADIUS"""
+        partition, vector = self.features(preferences, weather_data)
+        indexed = self._index.get(partition)
+        if indexed is None:
+            return None
+        
+        signatures, matrix = indexed
+        distances = np.linalg.norm(matrix - vector, axis=1)
+        for row in np.argsort(distances):
+            if distances[row] >= self.SIMILARITY_RADIUS:
+                break
+            venues = self._entries.get(signatures[row])
+            if venues is not None:
+                return venues
+        return None
+    
+    def set(self, signature: str, venues: List[Dict], preferences: Dict = None, weather_data: Dict = None):
+        """Cache venues for a signature, indexing them for similarity lookup if preferences are given"""
+        self._entries[signature] = venues
+        if preferences is None:
+            return
+        
+        partition, vector = self.features(preferences, weather_data)
+        signatures, matrix = self._index.get(partition, ([], np.empty((0, len(vector)))))
+        # One row per signature, newest last, capped at the entry limit; rows
+        # whose entries expired are skipped by get_similar until pushed out
+        keep = [row for row, cached_signature in enumerate(signatures) if cached_signature != signature]
+        keep = keep[max(len(keep) - (self._entries.maxsize - 1), 0):]
+        self._index[partition] = (
+            [signatures[row] for row in keep] + [signature],
+            np.vstack([matrix[keep], vector])
+        )
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Curated venues served when the AI client is unavailable or generation fails;
+# callers get deep copies since descriptions and accessibility notes may be
+# enhanced in place
+_FALLBACK_VENUES = (
+    {
+        "id": "ai_fallback_1",
+        "name": "Victoria Peak Sky Terrace",
+        "category": "attraction",
+        "description": "Hong Kong's premier viewing destination with panoramic city views and accessible facilities.",
+        "district": "Central and Western",
+        "address": "The Peak, Hong Kong Island",
+        "latitude": 22.2711,
+        "longitude": 114.1489,
+        "cost_range": [65, 100],
+        "accessibility": {
+            "wheelchair_accessible": True,
+            "has_elevator": True,
+            "accessible_toilets": True,
+            "step_free_access": True,
+            "notes": ["Peak Tram wheelchair accessible", "Sky Terrace has elevator access"]
+        },
+        "elderly_friendly": True,
+        "weather_suitability": "mixed"
+    },
+    {
+        "id": "ai_fallback_2",
+        "name": "Dim Sum Square (Accessible)",
+        "category": "restaurant",
+        "description": "Traditional Cantonese dim sum restaurant with senior-friendly seating and soft meal options.",
+        "district": "Central",
+        "address": "Central District, Hong Kong Island",
+        "latitude": 22.2816,
+        "longitude": 114.1578,
+        "cost_range": [150, 300],
+        "accessibility": {
+            "wheelchair_accessible": True,
+            "has_elevator": True,
+            "accessible_toilets": True,
+            "step_free_access": True,
+            "notes": ["Ground floor seating available", "Staff assistance provided"]
+        },
+        "dietary_options": {
+            "soft_meals": True,
+            "vegetarian": True,
+            "notes": ["Steamed dim sum options", "Congee available"]
+        },
+        "elderly_friendly": True,
+        "weather_suitability": "indoor"
+    }
+)
+
 class AIVenueService:
-    """Service for AI-generated venue recommendations"""
+    """Service for AI-generated venue recommendations
+    
+    The LLM calls are coroutines (``agenerate_*``/``aenhance_*``) executed on a
+    shared background event loop; the synchronous methods wrap them for
+    existing callers. Use ``generate_all`` to run all three requests
+    concurrently, so a page pays roughly the latency of the slowest one.
+    """
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize AI venue service"""
+    def __init__(self, api_key: Optional[str] = None, cache_profile: str = 'default',
+                 supports_prompt_cache: Optional[bool] = None, disk_cache_path: Optional[str] = None):
+        """Initialize AI venue service
+        
+        cache_profile selects a preset from services.cache.CACHE_PRESETS
+        ('default', 'aggressive' or 'conservative'). Generated venues are also
+        kept for a day in a SQLite cache at disk_cache_path (default
+        AI_CACHE_PATH or hk_venue_cache.db in the temp dir) so restarts start warm. supports_prompt_cache
+        tags the system prompt with cache_control (default from AI_PROMPT_CACHE,
+        on unless set to "false"); it switches itself off the first time the
+        endpoint rejects that message format.
+        """
         self.version = "2025-09-30-ai-v1"
         self.api_key = api_key
         self.client = None
-        self._cache = {}
-        self._cache_expiry = {}
-        
-        # Try hardcoded key first for simplicity
-        if not api_key:
-            api_key = self._get_hardcoded_key()
+        if supports_prompt_cache is None:
+            supports_prompt_cache = os.getenv('AI_PROMPT_CACHE', 'true').lower() == 'true'
+        self.supports_prompt_cache = supports_prompt_cache
+        self.supports_structured_output = True
+        self._env_key = None
+        self._env_key_loaded = False
+        # Exact-prompt tier keeps entries for at most 30 minutes
+        self._cache = create_cache(cache_profile)
+        self._cache.ttl = min(self._cache.ttl, 1800)
+        self._semantic_cache = SemanticVenueCache(cache_profile)
+        self._disk_cache = DiskCache(disk_cache_path or default_disk_cache_path('AI_CACHE_PATH', 'hk_venue_cache.db'))
+        # cache_key -> future for venue requests currently awaiting the LLM;
+        # only touched from the background event loop
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Optional micro-batching of concurrent cache misses (seconds, 0 = off)
+        self.batch_window = float(os.getenv('AI_BATCH_WINDOW_MS', '0')) / 1000
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._batch_task: Optional[asyncio.Task] = None
         
-        # If no hardcoded key, try environment/secrets
+        # Plain environment variables are the fast path; Streamlit secrets and
+        # .env are only consulted (and imported) when those are unset
+        api_key = api_key or os.environ.get('AI_API_KEY') or os.environ.get('OPENAI_API_KEY')
         if not api_key:
-            api_key = self._load_api_key_from_env()
+            api_key = self._get_env_key()
         
         if api_key:
             self._initialize_client(api_key)
         
+        # Opt-in: pre-generate common buckets on the background loop without blocking startup
+        if self.client and os.getenv('HK_WARM_CACHE'):
+            asyncio.run_coroutine_threadsafe(self.awarm_cache(), _get_event_loop())
+        
         logger.info(f"AIVenueService initialized - Version: {self.version}")
     
     def _initialize_client(self, api_key: str):
@@ -63,9 +721,10 @@ class AIVenueService:
             logger.info(f"Initializing OpenAI client with key length: {len(api_key)}")
             logger.info("Using base URL: https://chatapi.akash.network/api/v1")
             
-            self.client = openai.OpenAI(
+            self.client = openai.AsyncOpenAI(
                 api_key=api_key,
-                base_url="https://chatapi.akash.network/api/v1"
+                base_url="https://chatapi.akash.network/api/v1",
+                http_client=_get_http_client()
             )
             
             logger.info("✅ AI client initialized successfully")
@@ -83,81 +742,290 @@ class AIVenueService:
             self.client = None
     
     def set_api_key(self, api_key: str):
-        """Set API key and initialize client"""
+        """Set API key, reusing the existing client and its connection pool"""
         self.api_key = api_key
-        self._initialize_client(api_key)
+        if self.client and api_key and api_key.strip():
+            self.client = self.client.with_options(api_key=api_key)
+        else:
+            self._initialize_client(api_key)
     
     def generate_venues_for_preferences(self, preferences: Dict, weather_data: Dict = None) -> List[Dict]:
         """Generate venue recommendations based on user preferences"""
-        logger.info("=== GENERATING AI VENUES ===")
-        logger.info(f"Preferences: {preferences}")
-        logger.info(f"Weather data: {weather_data}")
+        return list(self.iter_venues_for_preferences(preferences, weather_data))
+    
+    def iter_venues_for_preferences(self, preferences: Dict, weather_data: Dict = None) -> Iterator[Dict]:
+        """Yield venue recommendations as soon as each one is streamed back"""
+        return _iter_sync(self.aiter_venues_for_preferences(preferences, weather_data))
+    
+    def generate_contextual_attractions(self, district: str = None, interests: List[str] = None) -> List[Dict]:
+        """Generate attractions for specific district or interests"""
+        return list(self.iter_contextual_attractions(district, interests))
+    
+    def iter_contextual_attractions(self, district: str = None, interests: List[str] = None) -> Iterator[Dict]:
+        """Yield attractions as soon as each one is streamed back"""
+        return _iter_sync(self.aiter_contextual_attractions(district, interests))
+    
+    def enhance_venue_descriptions(self, venues: List[Dict]) -> List[Dict]:
+        """Enhance existing venues with AI-generated descriptions"""
+        return _run_sync(self.aenhance_venue_descriptions(venues))
+    
+    def enhance_venue_descriptions_batched(self, venues: List[Dict], batch_size: int = _ENHANCEMENT_BATCH_SIZE) -> List[Dict]:
+        """Enhance any number of venues, one LLM request per batch_size venues"""
+        return _run_sync(self.aenhance_venue_descriptions_batched(venues, batch_size))
+    
+    def generate_all(self, preferences: Dict, weather_data: Dict = None, district: str = None,
+                     interests: List[str] = None, venues: List[Dict] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """Run venue generation, contextual attractions and enhancement concurrently"""
+        return _run_sync(self.agenerate_all(preferences, weather_data, district, interests, venues))
+    
+    def warm_cache(self, top_buckets: Optional[List[Dict]] = None) -> int:
+        """Pre-generate venues for common preference buckets; returns how many were warmed"""
+        return _run_sync(self.awarm_cache(top_buckets))
+    
+    async def awarm_cache(self, top_buckets: Optional[List[Dict]] = None) -> int:
+        """Generate venues for each bucket with bounded concurrency
+        
+        Buckets already held in any cache tier (including the disk cache from
+        a previous run) return immediately without an API call.
+        """
+        buckets = _WARM_CACHE_BUCKETS if top_buckets is None else top_buckets
+        semaphore = asyncio.Semaphore(_WARM_CACHE_CONCURRENCY)
+        
+        async def warm(preferences: Dict) -> bool:
+            async with semaphore:
+                await self.agenerate_venues_for_preferences(preferences)
+            # Fallback venues aren't cached, so this only counts real results
+            return self._cache.get(self._get_cache_key(preferences)) is not None
+        
+        results = await asyncio.gather(*(warm(preferences) for preferences in buckets), return_exceptions=True)
+        warmed = sum(result is True for result in results)
+        logger.info("Warmed AI venue cache for %d/%d preference buckets", warmed, len(buckets))
+        return warmed
+    
+    async def agenerate_all(self, preferences: Dict, weather_data: Dict = None, district: str = None,
+                            interests: List[str] = None, venues: List[Dict] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """Await all three LLM requests concurrently
+        
+        Returns (preference venues, contextual attractions, enhanced venues).
+        """
+        return tuple(await asyncio.gather(
+            self.agenerate_venues_for_preferences(preferences, weather_data),
+            self.agenerate_contextual_attractions(district, interests),
+            self.aenhance_venue_descriptions(venues or [])
+        ))
+    
+    async def agenerate_venues_for_preferences(self, preferences: Dict, weather_data: Dict = None) -> List[Dict]:
+        """Generate venue recommendations based on user preferences"""
+        return [venue async for venue in self.aiter_venues_for_preferences(preferences, weather_data)]
+    
+    async def aiter_venues_for_preferences(self, preferences: Dict, weather_data: Dict = None) -> AsyncIterator[Dict]:
+        """Stream venue recommendations, yielding each venue once its JSON object closes
+        
+        Responses that aren't a JSON array are parsed in full once the stream
+        ends. Only complete responses are cached. Every venue yielded is the
+        caller's own copy. Callers that stop early should aclose() the
+        generator so identical requests waiting on this one are released.
+        """
+        logger.debug("Generating AI venues - preferences: %s, weather: %s", preferences, weather_data)
         
         if not self.client:
             logger.warning("❌ AI client not available - using fallback data")
-            return self._get_fallback_venues()
-        
-        logger.info("✅ AI client is available, proceeding with generation")
+            for venue in self._get_fallback_venues():
+                yield venue
+            return
         
+        venues = []
+        inflight = None
+        completed = None
         try:
-            # Create context-aware prompt
-            prompt = self._create_venue_prompt(preferences, weather_data)
-            logger.info(f"Generated prompt (length: {len(prompt)}): {prompt[:200]}...")
-            
-            # Check cache first
-            cache_key = self._get_cache_key(prompt)
-            if self._is_cache_valid(cache_key):
-                logger.info("✅ Using cached AI venue recommendations")
-                return self._cache[cache_key]
+            # One canonical serialization feeds both the cache key and the prompt
+            payload = _canonical_json([preferences, weather_data or {}])
             
-            logger.info("No valid cache found, making API request...")
+            # Check exact-request cache first
+            cache_key = _hash_payload(payload)
+            cached_venues = self._cache.get(cache_key)
+            if cached_venues is None:
+                # Then the preference-level cache for equivalent requests
+                signature = SemanticVenueCache.signature(preferences, weather_data)
+                cached_venues = self._semantic_cache.get(signature)
+                if cached_venues is None:
+                    cached_venues = self._semantic_cache.get_similar(preferences, weather_data)
+                if cached_venues is not None:
+                    logger.debug("Using cached AI venue recommendations for equivalent preferences (%s)", signature)
+            else:
+                logger.debug("Using cached AI venue recommendations")
             
-            # Generate new recommendations
-            logger.info("Calling OpenAI API with model: Meta-Llama-3-1-8B-Instruct-FP8")
+            if cached_venues is None:
+                # Persistent tier survives restarts; promote hits back into memory
+                cached_venues = await asyncio.to_thread(self._disk_cache.get, cache_key)
+                if cached_venues is not None:
+                    logger.debug("Using AI venue recommendations from disk cache")
+                    self._cache[cache_key] = cached_venues
+                    self._semantic_cache.set(signature, cached_venues, preferences, weather_data)
             
-            response = self.client.chat.completions.create(
-                model="Meta-Llama-3-1-8B-Instruct-FP8",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+            if cached_venues is not None:
+                for venue in cached_venues:
+                    yield copy.deepcopy(venue)
+                return
             
-            logger.info("✅ Received response from AI API")
+            # Single-flight: an identical request already in progress answers this one too
+            leader = self._inflight.get(cache_key)
+            if leader is not None:
+                logger.debug("Awaiting in-flight AI venue request for identical preferences")
+                try:
+                    shared_venues = await asyncio.wait_for(asyncio.shield(leader), _INFLIGHT_WAIT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("In-flight AI venue request timed out - making a new request")
+                    shared_venues = None
+                if shared_venues is not None:
+                    for venue in shared_venues:
+                        yield copy.deepcopy(venue)
+                    return
+                # Leader failed, was abandoned or timed out - make our own request
             
-            # Parse AI response
-            ai_content = response.choices[0].message.content
-            logger.info(f"AI response length: {len(ai_content)}")
-            logger.info(f"AI response preview: {ai_content[:300]}...")
+            inflight = asyncio.get_running_loop().create_future()
+            self._inflight[cache_key] = inflight
             
-            venues = self._parse_ai_response(ai_content)
-            logger.info(f"Parsed {len(venues)} venues from AI response")
+            # Inside a batching window, share one LLM call with concurrent requests
+            batched_venues = await self._submit_batched(payload) if self.batch_window else None
+            if batched_venues is not None:
+                venues = batched_venues
+                for venue in venues:
+                    yield copy.deepcopy(venue)
+            else:
+                # Create context-aware prompt
+                prompt = _venue_prompt_for_payload(payload)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Generated prompt (length: %d): %s...", len(prompt), prompt[:200])
+                
+                # Generate new recommendations
+                async for venue in self._astream_venues(prompt):
+                    venues.append(venue)
+                    yield copy.deepcopy(venue)
             
             # Cache the results
             self._cache[cache_key] = venues
-            self._cache_expiry[cache_key] = datetime.now().timestamp() + 3600  # 1 hour cache
+            self._semantic_cache.set(signature, venues, preferences, weather_data)
+            await asyncio.to_thread(self._disk_cache.set, cache_key, venues)
+            completed = venues
             
-            logger.info(f"✅ Successfully generated {len(venues)} AI venue recommendations")
-            return venues
+            logger.info("Generated %d AI venue recommendations", len(venues))
             
         except Exception as e:
-            logger.error(f"❌ AI venue generation failed: {str(e)}", exc_info=True)
-            logger.info("Falling back to curated venues")
-            return self._get_fallback_venues()
+            logger.error("❌ AI venue generation failed: %s", e, exc_info=True)
+            if not venues:
+                logger.info("Falling back to curated venues")
+                for venue in self._get_fallback_venues():
+                    yield venue
+        finally:
+            if inflight is not None:
+                if self._inflight.get(cache_key) is inflight:
+                    del self._inflight[cache_key]
+                if not inflight.done():
+                    inflight.set_result(completed)
     
-    def generate_contextual_attractions(self, district: str = None, interests: List[str] = None) -> List[Dict]:
+    async def _astream_venues(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> AsyncIterator[Dict]:
+        """Stream one venue completion, yielding venues as their JSON objects close"""
+        logger.debug("Streaming completion from Meta-Llama-3-1-8B-Instruct-FP8")
+        
+        stream = await self._create_structured_completion(
+            _VENUE_SYSTEM_MESSAGES, prompt, _VENUE_RESPONSE_FORMAT,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        
+        parser = _VenueStreamParser()
+        seen_names = set()
+        streamed_any = False
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            for venue in self._iter_validated(parser.feed(chunk.choices[0].delta.content or ""), seen_names):
+                streamed_any = True
+                yield venue
+        
+        ai_content = parser.buffer
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Streamed AI response (length: %d): %s...", len(ai_content), ai_content[:300])
+        
+        if not streamed_any:
+            # Not a JSON array - parse the full text instead
+            for venue in self._parse_ai_response(ai_content):
+                yield venue
+    
+    async def _submit_batched(self, payload: bytes) -> Optional[List[Dict]]:
+        """Queue a venue request for the next micro-batch and await its slice
+        
+        Returns None if the batch response couldn't be split per request; the
+        caller then makes its own single request.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if self._batch_task is None:
+            self._batch_task = asyncio.get_running_loop().create_task(self._flush_batch())
+        return await asyncio.shield(future)
+    
+    async def _flush_batch(self):
+        """After the batching window, send all pending venue requests as one prompt"""
+        await asyncio.sleep(self.batch_window)
+        batch, self._pending, self._batch_task = self._pending, [], None
+        
+        results = [None] * len(batch)
+        try:
+            if len(batch) > 1:
+                results = await self._generate_batch([payload for payload, _ in batch])
+                logger.info("Served %d venue requests with one batched LLM call", len(batch))
+        except Exception as e:
+            logger.warning("Batched venue generation failed, retrying individually: %s", e)
+        finally:
+            # A lone request (or any unparsed slice) resolves to None and streams on its own
+            for (_, future), venues in zip(batch, results):
+                if not future.done():
+                    future.set_result(venues)
+    
+    async def _generate_batch(self, payloads: List[bytes]) -> List[Optional[List[Dict]]]:
+        """Ask for several preference sets in one completion and split the answer per request"""
+        sections = "\n\n".join(
+            f"Request {index}:\n{_venue_prompt_for_payload(payload)}"
+            for index, payload in enumerate(payloads, 1)
+        )
+        prompt = f"""Answer each of the following {len(payloads)} requests independently.
+
+{sections}
+
+Respond with a JSON array containing exactly {len(payloads)} arrays of venue objects, one per request, in order."""
+        
+        response = await self._create_chat_completion(
+            _VENUE_SYSTEM_MESSAGES, prompt,
+            temperature=0.7,
+            max_tokens=min(2000 * len(payloads), _BATCH_MAX_TOKENS)
+        )
+        content = response.choices[0].message.content
+        
+        start = content.find('[')
+        end = content.rfind(']')
+        data = _loads_repaired(content[start:end + 1]) if start != -1 and end > start else None
+        if not isinstance(data, list) or len(data) != len(payloads):
+            return [None] * len(payloads)
+        
+        return [
+            (list(self._iter_validated(section, set())) or None) if isinstance(section, list) else None
+            for section in data
+        ]
+    
+    async def agenerate_contextual_attractions(self, district: str = None, interests: List[str] = None) -> List[Dict]:
         """Generate attractions for specific district or interests"""
+        return [venue async for venue in self.aiter_contextual_attractions(district, interests)]
+    
+    async def aiter_contextual_attractions(self, district: str = None, interests: List[str] = None) -> AsyncIterator[Dict]:
+        """Stream attractions for a district or interests as each one is generated"""
         if not self.client:
-            return self._get_fallback_venues()
+            for venue in self._get_fallback_venues():
+                yield venue
+            return
         
+        count = 0
         try:
             prompt = f"""Generate 5 Hong Kong attractions for:
 District: {district or 'Any'}
@@ -165,234 +1033,279 @@ Interests: {', '.join(interests) if interests else 'General tourism'}
 
 Include accessibility information and practical details."""
             
-            response = self.client.chat.completions.create(
-                model="Meta-Llama-3-1-8B-Instruct-FP8",
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=1500
-            )
-            
-            venues = self._parse_ai_response(response.choices[0].message.content)
-            logger.info(f"Generated {len(venues)} contextual attractions")
-            return venues
+            async for venue in self._astream_venues(prompt, temperature=0.8, max_tokens=1500):
+                count += 1
+                yield venue
+            logger.info("Generated %d contextual attractions", count)
             
         except Exception as e:
-            logger.error(f"Contextual attraction generation failed: {str(e)}")
-            return []
+            logger.error("Contextual attraction generation failed: %s", e)
     
-    def enhance_venue_descriptions(self, venues: List[Dict]) -> List[Dict]:
-        """Enhance existing venues with AI-generated descriptions"""
+    async def aenhance_venue_descriptions_batched(self, venues: List[Dict], batch_size: int = _ENHANCEMENT_BATCH_SIZE) -> List[Dict]:
+        """Split venues into batches and enhance them with concurrent requests
+        
+        Each batch is a single structured-output call covering all its venues;
+        at most _ENHANCEMENT_CONCURRENCY batches are in flight at once.
+        """
+        if not self.client or not venues:
+            return venues
+        
+        semaphore = asyncio.Semaphore(_ENHANCEMENT_CONCURRENCY)
+        
+        async def enhance(batch: List[Dict]):
+            async with semaphore:
+                await self.aenhance_venue_descriptions(batch, batch_size)
+        
+        # Enhancements are applied to the venue dicts in place
+        await asyncio.gather(*(enhance(venues[i:i + batch_size]) for i in range(0, len(venues), batch_size)))
+        return venues
+    
+    async def aenhance_venue_descriptions(self, venues: List[Dict], limit: int = _ENHANCEMENT_BATCH_SIZE) -> List[Dict]:
+        """Enhance existing venues with AI-generated descriptions (the first limit venues)"""
         if not self.client or not venues:
             return venues
         
         try:
-            venue_names = [v.get('name', 'Unknown') for v in venues[:5]]  # Limit to 5 for API efficiency
+            venue_names = [v.get('name', 'Unknown') for v in venues[:limit]]
             
             prompt = f"""Enhance these Hong Kong venues with engaging descriptions and accessibility tips:
 {', '.join(venue_names)}
 
-For each venue, provide:
-1. Engaging 2-sentence description
-2. Accessibility highlights
-3. Best visiting tips for seniors/families"""
+For each venue, provide an engaging 2-sentence description and tips covering
+accessibility highlights and best visiting advice for seniors/families.
+
+Respond with JSON only, using each venue name exactly as given:
+{{"enhancements": [{{"name": "...", "description": "...", "tips": ["..."]}}]}}"""
             
-            response = self.client.chat.completions.create(
-                model="Meta-Llama-3-1-8B-Instruct-FP8",
-                messages=[
-                    {"role": "system", "content": "You are a Hong Kong tourism expert specializing in accessible travel."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = await self._create_structured_completion(
+                _ENHANCEMENT_SYSTEM_MESSAGES, prompt, _ENHANCEMENT_RESPONSE_FORMAT,
                 temperature=0.6,
-                max_tokens=1000
+                max_tokens=1000 + 150 * len(venue_names)
             )
             
             # Parse and apply enhancements
-            enhanced_info = self._parse_enhancement_response(response.choices[0].message.content)
+            enhanced_info = self._parse_enhancement_json(response.choices[0].message.content)
             return self._apply_enhancements(venues, enhanced_info)
             
         except Exception as e:
-            logger.error(f"Venue enhancement failed: {str(e)}")
+            logger.error("Venue enhancement failed: %s", e)
             return venues
     
-    def _create_venue_prompt(self, preferences: Dict, weather_data: Dict = None) -> str:
-        """Create contextual prompt for venue generation"""
-        family_comp = preferences.get('family_composition', {})
-        mobility_needs = preferences.get('mobility_needs', [])
-        dietary_restrictions = preferences.get('dietary_restrictions', [])
-        budget_range = preferences.get('budget_range', (200, 800))
-        duration = preferences.get('trip_duration', 3)
+    async def _create_structured_completion(self, system_messages: Tuple[Dict, Dict], prompt: str,
+                                            response_format: Dict, **kwargs):
+        """Send a chat completion constrained to a JSON schema when the endpoint supports it
         
-        weather_context = ""
-        if weather_data:
-            temp = weather_data.get('temperature', 25)
-            rainfall = weather_data.get('rainfall_probability', 20)
-            weather_context = f"Current weather: {temp}°C, {rainfall}% rain chance. "
+        The first rejected response_format switches structured output off for
+        this service; callers keep parsing the free-form reply as before.
+        Other bad requests (context length, max_tokens) leave it on and are
+        raised from the schema-free retry.
+        """
+        if self.supports_structured_output:
+            try:
+                return await self._create_chat_completion(
+                    system_messages, prompt, response_format=response_format, **kwargs
+                )
+            except openai.BadRequestError as e:
+                if not _RESPONSE_FORMAT_ERROR_RE.search(str(e)):
+                    # Only blame the schema if the same request goes through without it
+                    response = await self._create_chat_completion(system_messages, prompt, **kwargs)
+                    self._disable_structured_output(e)
+                    return response
+                self._disable_structured_output(e)
+        return await self._create_chat_completion(system_messages, prompt, **kwargs)
+    
+    def _disable_structured_output(self, error: Exception):
+        """Stop sending response_format after the endpoint rejected it"""
+        logger.warning(f"Structured output not supported by endpoint, disabling: {str(error)}")
+        self.supports_structured_output = False
+    
+    async def _create_chat_completion(self, system_messages: Tuple[Dict, Dict], prompt: str, **kwargs):
+        """Send a chat completion, marking the static system prompt cacheable when supported
         
-        prompt = f"""Generate {min(duration * 3, 10)} Hong Kong venues for a {duration}-day trip:
-
-Family: {family_comp.get('adults', 2)} adults, {family_comp.get('children', 0)} children, {family_comp.get('seniors', 0)} seniors
-Budget: HKD {budget_range[0]}-{budget_range[1]} per person per day
-Accessibility needs: {', '.join(mobility_needs) if mobility_needs else 'None'}
-Dietary needs: {', '.join(dietary_restrictions) if dietary_restrictions else 'None'}
-{weather_context}
-
-Include mix of attractions, restaurants, and transport. Focus on accessibility and senior-friendly options."""
+        system_messages is a (plain, cacheable) pair from _build_system_messages.
+        """
+        plain_system, cacheable_system = system_messages
+        user_message = {"role": "user", "content": prompt}
+        if not self.supports_prompt_cache:
+            return await self.client.chat.completions.create(
+                model="Meta-Llama-3-1-8B-Instruct-FP8", messages=[plain_system, user_message], **kwargs
+            )
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model="Meta-Llama-3-1-8B-Instruct-FP8", messages=[cacheable_system, user_message], **kwargs
+            )
+        except openai.BadRequestError as e:
+            # Only blame cache_control if the plain message goes through
+            response = await self.client.chat.completions.create(
+                model="Meta-Llama-3-1-8B-Instruct-FP8", messages=[plain_system, user_message], **kwargs
+            )
+            logger.warning(f"Prompt caching not supported by endpoint, disabling: {str(e)}")
+            self.supports_prompt_cache = False
+            return response
         
-        return prompt
+        self._log_prompt_cache_usage(response)
+        return response
+    
+    def _log_prompt_cache_usage(self, response):
+        """Log provider prompt-cache hits reported in the usage block"""
+        usage = getattr(response, 'usage', None)
+        if not usage:
+            return
+        
+        # Anthropic-style and OpenAI-style usage fields respectively
+        cached_tokens = getattr(usage, 'cache_read_input_tokens', None)
+        if cached_tokens is None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached_tokens = getattr(details, 'cached_tokens', None)
+        if cached_tokens:
+            logger.debug("Prompt cache hit: %d input tokens read from cache", cached_tokens)
+    
+    def _create_venue_prompt(self, preferences: Dict, weather_data: Dict = None) -> str:
+        """Create contextual prompt for venue generation"""
+        return _venue_prompt_for_payload(_canonical_json([preferences, weather_data or {}]))
     
     def _get_system_prompt(self) -> str:
         """Get system prompt for AI venue generation"""
-        return """You are a Hong Kong tourism expert. Recommend accessible venues for families and seniors.
-
-List 3-5 Hong Kong venues with these details:
-1. Victoria Peak (accessible viewing area)
-2. Dim Sum Restaurant (wheelchair accessible)  
-3. Hong Kong Museum (senior-friendly)
-4. Accessible Shopping Mall
-5. MTR Station (barrier-free)
-
-For each venue, mention:
-- Name and type (attraction/restaurant/museum/park/shopping/transport)
-- District location
-- Accessibility features (wheelchair, elevator, toilets)
-- Cost range in HKD
-- Why it's good for seniors/families
-
-Focus on real Hong Kong locations that are wheelchair accessible and senior-friendly."""
+        return _SYSTEM_PROMPT
     
     def _parse_ai_response(self, content: str) -> List[Dict]:
         """Parse AI response into venue data with robust error handling"""
-        logger.info(f"Parsing AI response (length: {len(content)})")
+        logger.debug("Parsing AI response (length: %d)", len(content))
         
-        # Skip JSON parsing entirely and go straight to smart text extraction
-        # This avoids all JSON parsing issues
+        # Fast path: a well-formed JSON array of venues
+        venues = self._parse_json_venues(content)
+        if venues:
+            logger.debug("Parsed %d venues from JSON", len(venues))
+            return venues
+        
+        # Otherwise fall back to smart text extraction, which tolerates free text
         return self._smart_extract_venues(content)
     
+    def _parse_json_venues(self, content: str) -> List[Dict]:
+        """Parse a JSON venue array embedded in the response, if any"""
+        start = content.find('[')
+        end = content.rfind(']')
+        if start == -1 or end <= start:
+            return []
+        
+        data = _loads_repaired(content[start:end + 1])
+        if not isinstance(data, list):
+            return []
+        
+        return list(self._iter_validated(data, set()))
+    
+    def _iter_validated(self, data: List, seen_names: set) -> Iterator[Dict]:
+        """Validate, normalize, number and de-duplicate parsed venues in one pass
+        
+        seen_names holds the lowercased names already emitted; pass the same
+        set across calls to number and de-duplicate a streamed response.
+        """
+        batch = []
+        for venue in data:
+            if not isinstance(venue, dict) or not self._validate_venue_data(venue):
+                continue
+            name_key = str(venue['name']).strip().lower()
+            if name_key in seen_names:
+                continue
+            seen_names.add(name_key)
+            venue.setdefault('id', f"ai_json_{len(seen_names)}")
+            if not venue.get('address') and venue.get('district'):
+                venue['address'] = f"{venue['district']}, Hong Kong"
+            batch.append(venue)
+        
+        _reset_coordinates_outside_hk(batch)
+        yield from batch
+    
     def _validate_venue_data(self, venue: Dict) -> bool:
         """Validate venue data structure"""
-        required_fields = ['name', 'category', 'description']
-        
-        for field in required_fields:
+        for field in _REQUIRED_VENUE_FIELDS:
             if not venue.get(field):
                 return False
         
         # Ensure valid category
-        valid_categories = ['attraction', 'restaurant', 'transport', 'museum', 'park', 'shopping']
-        if venue.get('category') not in valid_categories:
+        if venue['category'] not in _VALID_CATEGORIES:
             venue['category'] = 'attraction'
         
         # Ensure cost_range is valid
         if not venue.get('cost_range') or len(venue['cost_range']) != 2:
             venue['cost_range'] = [0, 100]
         
-        # Ensure coordinates are reasonable for Hong Kong
-        lat = venue.get('latitude', 22.3)
-        lng = venue.get('longitude', 114.2)
-        if not (22.1 <= lat <= 22.6 and 113.8 <= lng <= 114.5):
-            venue['latitude'] = 22.3
-            venue['longitude'] = 114.2
-        
+        # Coordinates are range-checked per batch in _reset_coordinates_outside_hk
         return True
     
+    def _parse_enhancement_json(self, content: str) -> Dict:
+        """Parse structured enhancement output into {name: {'description', 'tips'}}"""
+        try:
+            data = _json_loads(content)
+            return {
+                item['name']: {'description': item.get('description', ''), 'tips': item.get('tips', [])}
+                for item in data['enhancements']
+                if isinstance(item, dict) and item.get('name')
+            }
+        except (ValueError, TypeError, KeyError):
+            # Endpoint ignored the schema and answered in prose
+            logger.debug("Enhancement response was not valid JSON, using text parser")
+            return self._parse_enhancement_response(content)
+    
     def _parse_enhancement_response(self, content: str) -> Dict:
-        """Parse venue enhancement response"""
-        # Simple parsing for enhancement text
+        """Parse free-text venue enhancement response
+        
+        Header lines name a venue; the lines up to the next header are its
+        tips (if they mention accessibility or tips) or description.
+        """
         enhancements = {}
-        lines = content.split('\n')
-        current_venue = None
-        
-        for line in lines:
-            line = line.strip()
-            if ':' in line and any(word in line.lower() for word in ['venue', 'attraction', 'restaurant']):
-                current_venue = line.split(':')[0].strip()
-                enhancements[current_venue] = {'description': '', 'tips': []}
-            elif current_venue and line:
-                if 'accessibility' in line.lower() or 'tip' in line.lower():
-                    enhancements[current_venue]['tips'].append(line)
-                else:
-                    enhancements[current_venue]['description'] += line + ' '
+        headers = list(_ENHANCEMENT_HEADER_RE.finditer(content))
+        for header, next_header in zip(headers, headers[1:] + [None]):
+            body = content[header.end():next_header.start() if next_header else len(content)]
+            enhancements[header.group(1).strip()] = {
+                'description': ' '.join(_ENHANCEMENT_TIP_RE.sub('', body).split()),
+                'tips': _ENHANCEMENT_TIP_RE.findall(body)
+            }
         
         return enhancements
     
     def _apply_enhancements(self, venues: List[Dict], enhancements: Dict) -> List[Dict]:
         """Apply AI enhancements to venues"""
+        by_name = {name.lower(): enhancement for name, enhancement in enhancements.items()}
+        
         for venue in venues:
-            venue_name = venue.get('name', '')
-            for enhanced_name, enhancement in enhancements.items():
-                if enhanced_name.lower() in venue_name.lower():
-                    if enhancement.get('description'):
-                        venue['description'] = enhancement['description'].strip()
-                    if enhancement.get('tips'):
-                        venue.setdefault('accessibility', {})['notes'] = enhancement['tips']
-                    break
+            venue_name = venue.get('name', '').lower()
+            enhancement = by_name.get(venue_name)
+            if enhancement is None:
+                # Names are echoed back verbatim in JSON mode; substring scan only for prose replies
+                enhancement = next(
+                    (e for name, e in by_name.items() if name and name in venue_name), None
+                )
+            if enhancement is None:
+                continue
+            
+            if enhancement.get('description'):
+                venue['description'] = enhancement['description'].strip()
+            if enhancement.get('tips'):
+                venue.setdefault('accessibility', {})['notes'] = enhancement['tips']
         
         return venues
     
-    def _get_cache_key(self, prompt: str) -> str:
-        """Generate cache key for prompt"""
-        import hashlib
-        return hashlib.md5(prompt.encode()).hexdigest()
-    
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Check if cache entry is still valid"""
-        if cache_key not in self._cache:
-            return False
-        
-        expiry_time = self._cache_expiry.get(cache_key, 0)
-        return datetime.now().timestamp() < expiry_time
+    def _get_cache_key(self, preferences: Dict, weather_data: Dict = None) -> str:
+        """Generate cache key from the canonical request inputs"""
+        return _hash_payload(_canonical_json([preferences, weather_data or {}]))
     
     def _get_fallback_venues(self) -> List[Dict]:
         """Get fallback venues when AI is not available"""
-        return [
-            {
-                "id": "ai_fallback_1",
-                "name": "Victoria Peak Sky Terrace",
-                "category": "attraction",
-                "description": "Hong Kong's premier viewing destination with panoramic city views and accessible facilities.",
-                "district": "Central and Western",
-                "address": "The Peak, Hong Kong Island",
-                "latitude": 22.2711,
-                "longitude": 114.1489,
-                "cost_range": [65, 100],
-                "accessibility": {
-                    "wheelchair_accessible": True,
-                    "has_elevator": True,
-                    "accessible_toilets": True,
-                    "step_free_access": True,
-                    "notes": ["Peak Tram wheelchair accessible", "Sky Terrace has elevator access"]
-                },
-                "elderly_friendly": True,
-                "weather_suitability": "mixed"
-            },
-            {
-                "id": "ai_fallback_2",
-                "name": "Dim Sum Square (Accessible)",
-                "category": "restaurant",
-                "description": "Traditional Cantonese dim sum restaurant with senior-friendly seating and soft meal options.",
-                "district": "Central",
-                "address": "Central District, Hong Kong Island",
-                "latitude": 22.2816,
-                "longitude": 114.1578,
-                "cost_range": [150, 300],
-                "accessibility": {
-                    "wheelchair_accessible": True,
-                    "has_elevator": True,
-                    "accessible_toilets": True,
-                    "step_free_access": True,
-                    "notes": ["Ground floor seating available", "Staff assistance provided"]
-                },
-                "dietary_options": {
-                    "soft_meals": True,
-                    "vegetarian": True,
-                    "notes": ["Steamed dim sum options", "Congee available"]
-                },
-                "elderly_friendly": True,
-                "weather_suitability": "indoor"
-            }
-        ]
+        return copy.deepcopy(list(_FALLBACK_VENUES))
+    
+    def _get_env_key(self) -> Optional[str]:
+        """Get the environment/secrets API key, scanning sources only once"""
+        if not self._env_key_loaded:
+            self._env_key = self._load_api_key_from_env()
+            self._env_key_loaded = True
+        return self._env_key
+    
+    def invalidate_env_cache(self):
+        """Forget the cached environment/secrets key so the next lookup rescans"""
+        self._env_key = None
+        self._env_key_loaded = False
     
     def _load_api_key_from_env(self) -> Optional[str]:
         """Load API key from environment variables or Streamlit secrets"""
@@ -445,13 +1358,12 @@ Focus on real Hong Kong locations that are wheelchair accessible and senior-frie
         
         # Try environment variables
         try:
-            import os
             logger.info("Checking environment variables...")
             
+            # Load .env only when nothing else supplied a key
             try:
                 from dotenv import load_dotenv
                 load_dotenv()
-                logger.info("Loaded .env file")
             except ImportError:
                 logger.info("python-dotenv not available, checking system env vars only")
             
@@ -476,47 +1388,19 @@ Focus on real Hong Kong locations that are wheelchair accessible and senior-frie
         logger.warning("❌ No API key found in any source")
         return None
     
-    def _get_fallback_key(self) -> Optional[str]:
-        """Temporary fallback key for testing - REMOVE AFTER TESTING"""
-        # This is a temporary solution for testing
-        # The key will be removed after we confirm it works
-        import base64
-        
-        try:
-            # Encoded key for temporary testing
-            encoded_key = "c2stVVZLWUxoaU5mME1LWFJxYm5EaWVoQQ=="
-            decoded_key = base64.b64decode(encoded_key).decode('utf-8')
-            
-            logger.info("Using temporary fallback API key for testing")
-            return decoded_key
-            
-        except Exception as e:
-            logger.error(f"Error decoding fallback key: {str(e)}")
-            return None
-    
     def get_service_stats(self) -> Dict:
         """Get AI service statistics"""
-        env_key = self._load_api_key_from_env()
+        env_key = self._get_env_key()
         return {
             "version": self.version,
             "client_available": self.client is not None,
             "cache_entries": len(self._cache),
+            "semantic_cache_entries": len(self._semantic_cache),
+            "disk_cache_entries": len(self._disk_cache),
             "api_key_set": self.api_key is not None,
             "env_key_available": env_key is not None and len(env_key.strip()) > 0 if env_key else False
         }
     
-    def _get_hardcoded_key(self) -> Optional[str]:
-        """Get hardcoded API key - replace with your actual key"""
-        # TODO: Replace this with your actual API key
-        hardcoded_key = "sk-UVKYLhiNf0MKXRqbnDiehA"
-        
-        if hardcoded_key and hardcoded_key != "sk-your-api-key-here-replace-this-with-real-key":
-            logger.info(f"✅ Using hardcoded API key (length: {len(hardcoded_key)})")
-            return hardcoded_key
-        else:
-            logger.warning("Hardcoded API key not set - replace placeholder in _get_hardcoded_key method")
-            return None    
-
     # JSON parsing methods removed - using smart text extraction instead
     
     # Old text extraction method removed - using smart extraction instead
@@ -527,9 +1411,7 @@ Focus on real Hong Kong locations that are wheelchair accessible and senior-frie
 
     def _smart_extract_venues(self, content: str) -> List[Dict]:
         """Smart extraction of venues from AI response without JSON parsing"""
-        import re
-        
-        logger.info("Using smart venue extraction (bypassing JSON parsing)")
+        logger.debug("Using smart venue extraction")
         
         venues = []
         
@@ -537,20 +1419,9 @@ Focus on real Hong Kong locations that are wheelchair accessible and senior-frie
         # Look for common patterns in AI responses
         
         # Pattern 1: Look for venue names in various formats
-        name_patterns = [
-            r'"name":\s*"([^"]+)"',  # JSON format
-            r"'name':\s*'([^']+)'",  # JSON with single quotes
-            r'\d+\.\s*([A-Z][^0-9\n]+?)(?=\s*\d+\.|$)',  # Numbered lists
-            r'##?\s*([A-Z][^\n]+)',  # Markdown headers
-            r'-\s*([A-Z][^\n-]+)',   # Bullet points
-            r'•\s*([A-Z][^\n•]+)',   # Bullet points with bullet
-            r'(?:^|\n)([A-Z][^:\n]+(?:Restaurant|Museum|Park|Market|Temple|Peak|Ferry|Station|Centre|Center|Plaza|Square|Tower|Building|Mall|Gallery))',  # Lines starting with venue names
-        ]
-        
         found_names = []
-        for pattern in name_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            found_names.extend(matches)
+        for pattern in _VENUE_NAME_PATTERNS:
+            found_names.extend(pattern.findall(content))
         
         # Remove duplicates while preserving order
         unique_names = []
@@ -559,7 +1430,7 @@ Focus on real Hong Kong locations that are wheelchair accessible and senior-frie
             if clean_name and clean_name not in unique_names and len(clean_name) > 3:
                 unique_names.append(clean_name)
         
-        logger.info(f"Extracted {len(unique_names)} venue names: {unique_names[:5]}")
+        logger.debug("Extracted %d venue names: %s", len(unique_names), unique_names[:5])
         
         # Create venue objects from extracted names
         for i, name in enumerate(unique_names[:6]):  # Limit to 6 venues
@@ -569,11 +1440,11 @@ Focus on real Hong Kong locations that are wheelchair accessible and senior-frie
         
         # If we didn't find enough venues, add some guaranteed ones
         if len(venues) < 3:
-            logger.info("Adding guaranteed AI venues to reach minimum count")
+            logger.debug("Adding guaranteed AI venues to reach minimum count")
             guaranteed_venues = self._get_guaranteed_ai_venues()
             venues.extend(guaranteed_venues[:3 - len(venues)])
         
-        logger.info(f"Smart extraction completed: {len(venues)} venues created")
+        logger.debug("Smart extraction completed: %d venues created", len(venues))
         return venues
     
     def _create_venue_from_name(self, name: str, index: int) -> Dict:
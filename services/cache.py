@@ -0,0 +1,207 @@
+"""
+Caching utilities for Hong Kong Trip Planner
+Bounded in-memory caches shared by the service modules, plus a persistent
+SQLite tier for results worth keeping across restarts
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from typing import Any, Optional
+
+logger = logging.getLogger('services.cache')
+
+# Named size/lifetime profiles for service caches
+CACHE_PRESETS = {
+    'default': {'maxsize': 512, 'ttl': 3600},
+    'aggressive': {'maxsize': 10000, 'ttl': 86400},
+    'conservative': {'maxsize': 100, 'ttl': 300},
+}
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a fixed lifetime
+
+    Every operation holds an internal lock, so one instance can be shared by
+    worker threads and the background event loop.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600):
+        """Initialize cache with maximum entry count and lifetime in seconds"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Get a live value, evicting it if expired"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return default
+
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def _live_entry(self, key: Any) -> Optional[tuple]:
+        """Get the (expires_at, value) entry if present and live, evicting it if expired; lock held"""
+        entry = self._data.get(key)
+        if entry is not None and time.monotonic() >= entry[0]:
+            del self._data[key]
+            return None
+        return entry
+
+    def __setitem__(self, key: Any, value: Any):
+        self.set(key, value)
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Store a value for ttl seconds (the cache's ttl if omitted)"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+
+            # Evict least recently used entries beyond capacity
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Any) -> bool:
+        # Checks for a live entry, so a stored None still counts as present
+        with self._lock:
+            return self._live_entry(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._data)
+
+    def expire(self) -> int:
+        """Drop all expired entries and return how many were removed"""
+        with self._lock:
+            return self._expire()
+
+    def _expire(self) -> int:
+        """Drop expired entries; lock held"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if now >= expires_at]
+        for key in expired:
+            del self._data[key]
+        return len(expired)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """Remove an entry and return its value (default if missing)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+def create_cache(profile: str = 'default', **overrides) -> TTLCache:
+    """Create a TTLCache from a named preset, optionally overriding maxsize/ttl"""
+    settings = dict(CACHE_PRESETS.get(profile, CACHE_PRESETS['default']))
+    settings.update(overrides)
+    return TTLCache(maxsize=settings['maxsize'], ttl=settings['ttl'])
+
+# Fallback location of a persistent cache when no path is given; services
+# resolve their own file via default_disk_cache_path so they don't share one
+DISK_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'hk_trip_planner_cache.db')
+
+def default_disk_cache_path(env_var: str, filename: str) -> str:
+    """Cache file named by env_var, else filename in the temp dir"""
+    return os.getenv(env_var) or os.path.join(tempfile.gettempdir(), filename)
+
+class DiskCache:
+    """Persistent key/value cache in SQLite with per-entry expiry
+    
+    Values are stored as JSON. Every operation opens (and closes) its own
+    connection, so an instance can be shared across threads; storage errors are logged and
+    treated as misses, never raised to callers.
+    """
+    
+    def __init__(self, path: Optional[str] = None, default_ttl: float = 86400):
+        """Initialize cache file and default entry lifetime in seconds"""
+        self.path = path or DISK_CACHE_PATH
+        self.default_ttl = default_ttl
+        try:
+            with self._connect() as conn:
+                # WAL lets concurrent Streamlit sessions read while one writes
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache unavailable at {self.path}: {str(e)}")
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed"""
+        # sqlite3's own context manager only commits; closing() releases the handle
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            yield conn
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a live value, or default if missing, expired or unreadable"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache read failed: {str(e)}")
+            return default
+        return json.loads(row[0]) if row else default
+    
+    def set(self, key: str, value: Any, expire: Optional[float] = None):
+        """Store a JSON-serializable value for expire seconds (default_ttl if omitted)"""
+        expires_at = time.time() + (self.default_ttl if expire is None else expire)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache write failed: {str(e)}")
+    
+    def delete(self, key: str):
+        """Remove one entry if present"""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache delete failed: {str(e)}")
+    
+    def expire(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        try:
+            with self._connect() as conn:
+                return conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache cleanup failed: {str(e)}")
+            return 0
+    
+    def clear(self):
+        """Remove all entries"""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache")
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache clear failed: {str(e)}")
+    
+    def __len__(self) -> int:
+        try:
+            with self._connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM cache WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        except sqlite3.Error:
+            return 0
@@ -4,16 +4,61 @@ Handles public toilets, accessibility facilities, and other amenities
 """
 
 import requests
+import functools
+import itertools
 import logging
+import numpy as np
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+# Optional import for spatial indexing of route queries
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    cKDTree = None
+
 # Configure logging
 logger = logging.getLogger('services.facilities_service')
 
-@dataclass
+# Mean radius of the earth in kilometers
+EARTH_RADIUS_KM = 6371
+
+# Equirectangular projection centred on Hong Kong, accurate to well under
+# a percent at city scale
+KM_PER_DEGREE = 111.0
+_HK_LON_SCALE = np.cos(np.radians(22.3))
+
+# User need -> (accessibility feature it requires, recommendation score weight)
+NEED_FEATURE_WEIGHTS = {
+    "wheelchair": ("wheelchair_accessible", 3),
+    "baby_changing": ("baby_changing", 2),
+    "rest_area": ("rest_area", 2),
+    "hearing_aid": ("hearing_loop", 2),
+}
+
+# Search radius around each route waypoint
+ROUTE_RADIUS_KM = 0.5
+
+def _project_km(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Project degree coordinates onto a flat kilometer grid, one (y, x) row per point"""
+    return np.column_stack([lats * KM_PER_DEGREE, lons * KM_PER_DEGREE * _HK_LON_SCALE])
+
+def _haversine_km(lat_rad, lon_rad, lats_rad: np.ndarray, lons_rad: np.ndarray) -> np.ndarray:
+    """Vectorized Haversine distance in kilometers between points given in radians
+    
+    Inputs broadcast against each other, so one point vs. an array of
+    facilities gives a distance per facility.
+    """
+    dlat = lats_rad - lat_rad
+    dlon = lons_rad - lon_rad
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+@dataclass(slots=True, frozen=True)
 class PublicFacility:
-    """Public facility information"""
+    """Public facility information (immutable; instances are shared by the module caches)"""
     id: str
     name: str
     category: str  # 'toilet', 'rest_area', 'accessibility'
@@ -25,22 +70,190 @@ class PublicFacility:
     opening_hours: str = ""
     notes: str = ""
 
+@functools.cache
+def _sample_toilets() -> Tuple[PublicFacility, ...]:
+    """Sample public toilet data (to be replaced with real API), built once per process"""
+    return (
+        PublicFacility(
+            id="toilet_001",
+            name="Central MTR Station Public Toilet",
+            category="toilet",
+            latitude=22.2816,
+            longitude=114.1578,
+            address="Central MTR Station, Central",
+            district="Central and Western",
+            accessibility_features={
+                "wheelchair_accessible": True,
+                "baby_changing": True,
+                "accessible_toilet": True,
+                "grab_rails": True
+            },
+            opening_hours="24 hours",
+            notes="Located near Exit A"
+        ),
+        PublicFacility(
+            id="toilet_002", 
+            name="Tsim Sha Tsui Promenade Public Toilet",
+            category="toilet",
+            latitude=22.2942,
+            longitude=114.1722,
+            address="Tsim Sha Tsui Promenade, Tsim Sha Tsui",
+            district="Yau Tsim Mong",
+            accessibility_features={
+                "wheelchair_accessible": True,
+                "baby_changing": True,
+                "accessible_toilet": True,
+                "grab_rails": True
+            },
+            opening_hours="06:00-23:00",
+            notes="Near the Star Ferry Pier"
+        ),
+        PublicFacility(
+            id="toilet_003",
+            name="Hong Kong Park Public Toilet",
+            category="toilet", 
+            latitude=22.2769,
+            longitude=114.1628,
+            address="Hong Kong Park, Central",
+            district="Central and Western",
+            accessibility_features={
+                "wheelchair_accessible": True,
+                "baby_changing": False,
+                "accessible_toilet": True,
+                "grab_rails": True
+            },
+            opening_hours="06:00-23:00",
+            notes="Near the main entrance"
+        ),
+        PublicFacility(
+            id="toilet_004",
+            name="Victoria Peak Public Toilet",
+            category="toilet",
+            latitude=22.2711,
+            longitude=114.1489,
+            address="The Peak, Hong Kong Island",
+            district="Central and Western",
+            accessibility_features={
+                "wheelchair_accessible": False,
+                "baby_changing": True,
+                "accessible_toilet": False,
+                "grab_rails": True
+            },
+            opening_hours="08:00-22:00",
+            notes="Limited accessibility due to terrain"
+        )
+    )
+
+@functools.cache
+def _sample_accessibility_facilities() -> Tuple[PublicFacility, ...]:
+    """Sample accessibility facility data, built once per process"""
+    return (
+        PublicFacility(
+            id="access_001",
+            name="Central Library Accessibility Center",
+            category="accessibility",
+            latitude=22.2783,
+            longitude=114.1747,
+            address="66 Causeway Road, Causeway Bay",
+            district="Wan Chai",
+            accessibility_features={
+                "wheelchair_accessible": True,
+                "braille_materials": True,
+                "hearing_loop": True,
+                "accessible_computer": True,
+                "rest_area": True
+            },
+            opening_hours="09:00-20:00 (Mon-Sat), 13:00-17:00 (Sun)",
+            notes="Full accessibility services available"
+        ),
+        PublicFacility(
+            id="access_002",
+            name="Hong Kong Space Museum Accessibility Services",
+            category="accessibility",
+            latitude=22.2942,
+            longitude=114.1722,
+            address="10 Salisbury Road, Tsim Sha Tsui",
+            district="Yau Tsim Mong",
+            accessibility_features={
+                "wheelchair_accessible": True,
+                "audio_guide": True,
+                "tactile_exhibits": True,
+                "accessible_parking": True,
+                "rest_area": True
+            },
+            opening_hours="10:00-21:00 (Mon, Wed-Fri), 10:00-21:00 (Sat-Sun)",
+            notes="Closed on Tuesdays except public holidays"
+        )
+    )
+
+@functools.lru_cache(maxsize=32)
+def _toilets_in_district(district: str) -> Tuple[PublicFacility, ...]:
+    """Sample toilets in a district (lowercased name), memoized per district"""
+    return tuple(t for t in _sample_toilets() if t.district.lower() == district)
+
 class FacilitiesService:
     """Service for managing public facilities and amenities"""
     
     def __init__(self):
         """Initialize facilities service"""
         self.timeout = 10
+        # facility_type -> (facilities, latitudes rad, longitudes rad), built on first use
+        self._facility_index: Dict[str, Tuple[List[PublicFacility], np.ndarray, np.ndarray]] = {}
+        # facility_type -> KD-tree over projected coordinates (scipy only)
+        self._facility_trees: Dict[str, 'cKDTree'] = {}
+        # (facilities, feature -> column, N x F feature matrix, features per facility)
+        self._recommendation_index = None
+    
+    def _get_recommendation_index(self) -> Tuple[Tuple[PublicFacility, ...], Dict[str, int], np.ndarray, np.ndarray]:
+        """Get all recommendable facilities with their accessibility features as a 0/1 matrix"""
+        if self._recommendation_index is None:
+            facilities = tuple(itertools.chain(self.get_public_toilets(), self.get_accessibility_facilities()))
+            feature_names = sorted({name for f in facilities for name in f.accessibility_features})
+            feature_matrix = np.array(
+                [[bool(f.accessibility_features.get(name)) for name in feature_names] for f in facilities],
+                dtype=np.int32
+            ).reshape(len(facilities), len(feature_names))
+            self._recommendation_index = (
+                facilities,
+                {name: column for column, name in enumerate(feature_names)},
+                feature_matrix,
+                feature_matrix.sum(axis=1)
+            )
+        return self._recommendation_index
+    
+    def _get_facility_index(self, facility_type: str) -> Tuple[List[PublicFacility], np.ndarray, np.ndarray]:
+        """Get facilities of a type with their coordinates as contiguous radian arrays"""
+        if facility_type not in self._facility_index:
+            if facility_type == "toilet":
+                facilities = self.get_public_toilets()
+            elif facility_type == "accessibility":
+                facilities = self.get_accessibility_facilities()
+            else:
+                facilities = []
+            
+            self._facility_index[facility_type] = (
+                facilities,
+                np.radians(np.array([f.latitude for f in facilities], dtype=np.float64)),
+                np.radians(np.array([f.longitude for f in facilities], dtype=np.float64))
+            )
+        return self._facility_index[facility_type]
+    
+    def _get_facility_tree(self, facility_type: str) -> 'cKDTree':
+        """Get a KD-tree over the projected coordinates of a facility type"""
+        if facility_type not in self._facility_trees:
+            _, lat_rad, lon_rad = self._get_facility_index(facility_type)
+            self._facility_trees[facility_type] = cKDTree(_project_km(np.degrees(lat_rad), np.degrees(lon_rad)))
+        return self._facility_trees[facility_type]
     
     def get_public_toilets(self, district: Optional[str] = None) -> List[PublicFacility]:
         """Get public toilets information"""
         try:
             # Note: This would use the Toilet Rush API or similar
             # For now, we'll return some sample data
-            toilets = self._get_sample_toilets()
-            
             if district:
-                toilets = [t for t in toilets if t.district.lower() == district.lower()]
+                toilets = list(_toilets_in_district(district.lower()))
+            else:
+                toilets = list(_sample_toilets())
             
             logger.info(f"Retrieved {len(toilets)} public toilets")
             return toilets
@@ -53,17 +266,9 @@ class FacilitiesService:
                             radius_km: float = 1.0) -> List[PublicFacility]:
         """Get facilities near a specific location"""
         try:
-            all_facilities = self.get_public_toilets()
-            nearby = []
-            
-            for facility in all_facilities:
-                distance = self._calculate_distance(
-                    latitude, longitude, 
-                    facility.latitude, facility.longitude
-                )
-                
-                if distance <= radius_km:
-                    nearby.append(facility)
+            toilets, lat_rad, lon_rad = self._get_facility_index("toilet")
+            distances = _haversine_km(np.radians(latitude), np.radians(longitude), lat_rad, lon_rad)
+            nearby = [toilets[i] for i in np.nonzero(distances <= radius_km)[0]]
             
             logger.info(f"Found {len(nearby)} facilities within {radius_km}km")
             return nearby
@@ -76,7 +281,7 @@ class FacilitiesService:
         """Get specialized accessibility facilities"""
         try:
             # This would integrate with HK Rehabilitation Society data
-            facilities = self._get_sample_accessibility_facilities()
+            facilities = list(_sample_accessibility_facilities())
             
             logger.info(f"Retrieved {len(facilities)} accessibility facilities")
             return facilities
@@ -85,165 +290,33 @@ class FacilitiesService:
             logger.warning(f"Could not fetch accessibility facilities: {str(e)}")
             return []
     
-    def _get_sample_toilets(self) -> List[PublicFacility]:
-        """Get sample public toilet data (to be replaced with real API)"""
-        return [
-            PublicFacility(
-                id="toilet_001",
-                name="Central MTR Station Public Toilet",
-                category="toilet",
-                latitude=22.2816,
-                longitude=114.1578,
-                address="Central MTR Station, Central",
-                district="Central and Western",
-                accessibility_features={
-                    "wheelchair_accessible": True,
-                    "baby_changing": True,
-                    "accessible_toilet": True,
-                    "grab_rails": True
-                },
-                opening_hours="24 hours",
-                notes="Located near Exit A"
-            ),
-            PublicFacility(
-                id="toilet_002", 
-                name="Tsim Sha Tsui Promenade Public Toilet",
-                category="toilet",
-                latitude=22.2942,
-                longitude=114.1722,
-                address="Tsim Sha Tsui Promenade, Tsim Sha Tsui",
-                district="Yau Tsim Mong",
-                accessibility_features={
-                    "wheelchair_accessible": True,
-                    "baby_changing": True,
-                    "accessible_toilet": True,
-                    "grab_rails": True
-                },
-                opening_hours="06:00-23:00",
-                notes="Near the Star Ferry Pier"
-            ),
-            PublicFacility(
-                id="toilet_003",
-                name="Hong Kong Park Public Toilet",
-                category="toilet", 
-                latitude=22.2769,
-                longitude=114.1628,
-                address="Hong Kong Park, Central",
-                district="Central and Western",
-                accessibility_features={
-                    "wheelchair_accessible": True,
-                    "baby_changing": False,
-                    "accessible_toilet": True,
-                    "grab_rails": True
-                },
-                opening_hours="06:00-23:00",
-                notes="Near the main entrance"
-            ),
-            PublicFacility(
-                id="toilet_004",
-                name="Victoria Peak Public Toilet",
-                category="toilet",
-                latitude=22.2711,
-                longitude=114.1489,
-                address="The Peak, Hong Kong Island",
-                district="Central and Western",
-                accessibility_features={
-                    "wheelchair_accessible": False,
-                    "baby_changing": True,
-                    "accessible_toilet": False,
-                    "grab_rails": True
-                },
-                opening_hours="08:00-22:00",
-                notes="Limited accessibility due to terrain"
-            )
-        ]
-    
-    def _get_sample_accessibility_facilities(self) -> List[PublicFacility]:
-        """Get sample accessibility facility data"""
-        return [
-            PublicFacility(
-                id="access_001",
-                name="Central Library Accessibility Center",
-                category="accessibility",
-                latitude=22.2783,
-                longitude=114.1747,
-                address="66 Causeway Road, Causeway Bay",
-                district="Wan Chai",
-                accessibility_features={
-                    "wheelchair_accessible": True,
-                    "braille_materials": True,
-                    "hearing_loop": True,
-                    "accessible_computer": True,
-                    "rest_area": True
-                },
-                opening_hours="09:00-20:00 (Mon-Sat), 13:00-17:00 (Sun)",
-                notes="Full accessibility services available"
-            ),
-            PublicFacility(
-                id="access_002",
-                name="Hong Kong Space Museum Accessibility Services",
-                category="accessibility",
-                latitude=22.2942,
-                longitude=114.1722,
-                address="10 Salisbury Road, Tsim Sha Tsui",
-                district="Yau Tsim Mong",
-                accessibility_features={
-                    "wheelchair_accessible": True,
-                    "audio_guide": True,
-                    "tactile_exhibits": True,
-                    "accessible_parking": True,
-                    "rest_area": True
-                },
-                opening_hours="10:00-21:00 (Mon, Wed-Fri), 10:00-21:00 (Sat-Sun)",
-                notes="Closed on Tuesdays except public holidays"
-            )
-        ]
-    
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points in kilometers using Haversine formula"""
-        import math
-        
-        # Convert latitude and longitude from degrees to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of earth in kilometers
-        r = 6371
-        
-        return c * r
+        lat1, lon1, lat2, lon2 = np.radians([lat1, lon1, lat2, lon2])
+        return float(_haversine_km(lat1, lon1, lat2, lon2))
     
     def find_facilities_along_route(self, waypoints: List[Tuple[float, float]], 
                                   facility_type: str = "toilet") -> List[PublicFacility]:
         """Find facilities along a route defined by waypoints"""
         try:
-            all_facilities = []
-            
-            if facility_type == "toilet":
-                all_facilities = self.get_public_toilets()
-            elif facility_type == "accessibility":
-                all_facilities = self.get_accessibility_facilities()
-            
-            route_facilities = []
+            facilities, lat_rad, lon_rad = self._get_facility_index(facility_type)
+            if not facilities or not waypoints:
+                return []
             
-            for waypoint in waypoints:
-                nearby = self.get_nearby_facilities(
-                    waypoint[0], waypoint[1], radius_km=0.5
+            route = np.asarray(waypoints, dtype=np.float64).reshape(-1, 2)
+            if SCIPY_AVAILABLE:
+                # One radius query for all waypoints against the KD-tree
+                neighbours = self._get_facility_tree(facility_type).query_ball_point(
+                    _project_km(route[:, 0], route[:, 1]), r=ROUTE_RADIUS_KM
                 )
-                route_facilities.extend(nearby)
+                indices = np.unique(np.concatenate([np.asarray(n, dtype=np.intp) for n in neighbours]))
+            else:
+                # Waypoints x facilities distance matrix in a single broadcast
+                route_rad = np.radians(route)
+                distances = _haversine_km(route_rad[:, :1], route_rad[:, 1:], lat_rad[None, :], lon_rad[None, :])
+                indices = np.unique(np.nonzero(distances <= ROUTE_RADIUS_KM)[1])
             
-            # Remove duplicates
-            unique_facilities = []
-            seen_ids = set()
-            
-            for facility in route_facilities:
-                if facility.id not in seen_ids:
-                    unique_facilities.append(facility)
-                    seen_ids.add(facility.id)
+            unique_facilities = [facilities[i] for i in indices]
             
             logger.info(f"Found {len(unique_facilities)} facilities along route")
             return unique_facilities
@@ -255,27 +328,21 @@ class FacilitiesService:
     def get_facility_recommendations(self, user_needs: List[str]) -> List[PublicFacility]:
         """Get facility recommendations based on user needs"""
         try:
-            all_facilities = self.get_public_toilets() + self.get_accessibility_facilities()
-            recommended = []
+            facilities, feature_position, feature_matrix, feature_counts = self._get_recommendation_index()
+            
+            # User needs -> weight per feature column
+            weights = np.zeros(len(feature_position), dtype=np.int32)
+            for need in set(user_needs):
+                feature, weight = NEED_FEATURE_WEIGHTS.get(need, (None, 0))
+                if feature in feature_position:
+                    weights[feature_position[feature]] += weight
             
-            for facility in all_facilities:
-                score = 0
-                
-                # Score based on user needs
-                if "wheelchair" in user_needs and facility.accessibility_features.get("wheelchair_accessible"):
-                    score += 3
-                if "baby_changing" in user_needs and facility.accessibility_features.get("baby_changing"):
-                    score += 2
-                if "rest_area" in user_needs and facility.accessibility_features.get("rest_area"):
-                    score += 2
-                if "hearing_aid" in user_needs and facility.accessibility_features.get("hearing_loop"):
-                    score += 2
-                
-                if score > 0:
-                    recommended.append(facility)
+            scores = feature_matrix @ weights
+            matched = np.nonzero(scores > 0)[0]
             
-            # Sort by score (highest first)
-            recommended.sort(key=lambda f: sum(f.accessibility_features.values()), reverse=True)
+            # Most-equipped facilities first; stable so ties keep source order
+            order = matched[np.argsort(-feature_counts[matched], kind='stable')]
+            recommended = [facilities[i] for i in order]
             
             logger.info(f"Recommended {len(recommended)} facilities based on user needs")
             return recommended
@@ -4,140 +4,621 @@ Integrates with various HK government APIs for attractions, events, and faciliti
 """
 
 import requests
+import asyncio
+import csv
+import io
+import json
+import numpy as np
 import logging
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+import queue
+import re
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Tuple
+from datetime import date, timedelta
 from models import Venue, VenueCategory, Location, AccessibilityInfo, DietaryOption, WeatherSuitability
+from services.cache import DiskCache, TTLCache, default_disk_cache_path
+
+# Optional import for faster JSON parsing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# Optional import for faster XML parsing
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    lxml_etree = None
 
 # Configure logging
 logger = logging.getLogger('services.hk_gov_data_service')
 
+# Upper bound on concurrent requests to government endpoints
+MAX_CONCURRENT_FETCHES = 8
+
+# How long parsed payloads stay cached per source (seconds); these
+# datasets change daily at most
+GOV_CACHE_TTLS = {
+    'attractions': 24 * 3600,
+    'events': 3600,
+    'restaurants': 24 * 3600,
+    'mtr': 7 * 24 * 3600
+}
+
+# How long a payload stays on disk after it goes stale, so its ETag/Last-Modified
+# validators can be replayed in a conditional GET and it can be served while the
+# upstream API is down
+GOV_REVALIDATE_TTL = 30 * 24 * 3600
+
+# Read buffer for streamed CSV downloads
+CSV_READ_BUFFER_SIZE = 64 * 1024
+
+# Body chunks a download thread may read ahead of the parser (~1 MB at 64 KB each)
+PREFETCH_QUEUE_CHUNKS = 16
+
+# fetch_all source name -> fetcher method
+GOV_DATA_SOURCES = {
+    'attractions': 'get_major_attractions',
+    'events': 'get_hktb_events',
+    'restaurants': 'get_restaurant_licenses',
+    'mtr': 'get_mtr_accessibility_info',
+    'facilities': 'get_accessible_facilities'
+}
+
+# Child elements copied from each FEHD restaurant record
+RESTAURANT_XML_FIELDS = frozenset(('name', 'licensee_name', 'district', 'address', 'licence_type', 'licence_no'))
+
+# Restaurant fields with few distinct values; interned so records share one string each
+RESTAURANT_XML_SHARED_FIELDS = frozenset(('district', 'licence_type'))
+
+# Bytes fed to the XML parser per read of a streamed response
+XML_READ_CHUNK_SIZE = 64 * 1024
+
+# Government category -> venue category
+VENUE_CATEGORY_MAP = {
+    'attraction': VenueCategory.ATTRACTION,
+    'restaurant': VenueCategory.RESTAURANT,
+    'event': VenueCategory.ATTRACTION,  # Events as attractions
+    'facility': VenueCategory.ATTRACTION,
+    'museum': VenueCategory.MUSEUM,
+    'park': VenueCategory.PARK
+}
+
+# Admission fee text meaning no charge (case-insensitive, no lowercased copy)
+FREE_ADMISSION_PATTERN = re.compile(r'free|免費|no charge', re.IGNORECASE)
+
+# Default HKD cost range by venue category when the fee isn't free
+CATEGORY_COST_RANGES = {
+    VenueCategory.ATTRACTION: (20, 100),
+    VenueCategory.MUSEUM: (10, 50),
+    VenueCategory.RESTAURANT: (50, 200),
+    VenueCategory.PARK: (0, 0)
+}
+
+# Output field tables for the _process_* passes:
+# (output key, source key, fallback source key, default)
+ATTRACTION_FIELDS = (
+    ('name', 'name_en', 'name', 'Unknown Attraction'),
+    ('name_zh', 'name_zh', 'name_zh', ''),
+    ('description', 'description_en', 'description', ''),
+    ('district', 'district_en', 'district', ''),
+    ('address', 'address_en', 'address', ''),
+    ('phone', 'phone', 'phone', ''),
+    ('website', 'website', 'website', ''),
+    ('admission_fee', 'admission_fee', 'admission_fee', '')
+)
+EVENT_FIELDS = (
+    ('name', 'name_en', 'name', 'Unknown Event'),
+    ('name_zh', 'name_zh', 'name_zh', ''),
+    ('description', 'description_en', 'description', ''),
+    ('venue', 'venue_en', 'venue', ''),
+    ('district', 'district_en', 'district', ''),
+    ('date', 'date', 'date', ''),
+    ('time', 'time', 'time', ''),
+    ('admission', 'admission', 'admission', 'Free'),
+    ('website', 'website', 'website', '')
+)
+RESTAURANT_FIELDS = (
+    ('name', 'name_en', 'name', 'Unknown Restaurant'),
+    ('name_zh', 'name_zh', 'name_zh', ''),
+    ('district', 'district_en', 'district', ''),
+    ('address', 'address_en', 'address', ''),
+    ('licence_type', 'licence_type', 'licence_type', ''),
+    ('licence_no', 'licence_no', 'licence_no', '')
+)
+FACILITY_FIELDS = (
+    ('name', 'name_en', 'name', 'Unknown Facility'),
+    ('name_zh', 'name_zh', 'name_zh', ''),
+    ('category', 'category', 'category', 'facility'),
+    ('district', 'district_en', 'district', ''),
+    ('address', 'address_en', 'address', '')
+)
+FACILITY_FEATURES = ('wheelchair_accessible', 'has_lift', 'accessible_toilet', 'accessible_parking', 'braille_signage', 'hearing_loop')
+
+# MTR barrier-free facility types that give step-free access, matched in one pass
+MTR_LIFT_PATTERN = re.compile(r'lift|elevator', re.IGNORECASE)
+
+def _map_fields(row: Dict, fields: Tuple) -> Dict:
+    """Copy fields from a source row per a field table (source key wins even if empty)"""
+    return {out: row[key] if key in row else row.get(fallback, default) for out, key, fallback, default in fields}
+
+def _parse_coordinates(coords: List[str]) -> np.ndarray:
+    """Parse "lat, lng" strings into an (N, 2) float array, NaN where unparseable"""
+    result = np.full((len(coords), 2), np.nan)
+    if not coords:
+        return result
+    
+    parts = np.char.partition(np.array(coords, dtype=str), ',')
+    valid = np.flatnonzero(parts[:, 1] == ',')
+    pairs = parts[valid][:, ::2]  # lat and lng text either side of the first comma
+    try:
+        result[valid] = pairs.astype(np.float64)
+    except ValueError:
+        # Some pairs are malformed - convert row by row so the rest survive
+        for index, pair in zip(valid, pairs):
+            try:
+                result[index] = pair.astype(np.float64)
+            except ValueError:
+                logger.debug(f"Unparseable coordinates: {coords[index]!r}")
+    return result
+
+def _validator_headers(response: requests.Response) -> Dict[str, str]:
+    """Conditional request headers that revalidate a response's ETag/Last-Modified"""
+    headers = {}
+    if response.headers.get('ETag'):
+        headers['If-None-Match'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        headers['If-Modified-Since'] = response.headers['Last-Modified']
+    return headers
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class NotFoundError(requests.HTTPError):
+    """A government endpoint answered 404 (dataset moved or withdrawn)"""
+
+class _PrefetchReader(io.RawIOBase):
+    """Read-only stream over a response body that a background thread downloads
+    
+    The thread reads up to PREFETCH_QUEUE_CHUNKS chunks ahead into a bounded
+    queue, so socket waits (which release the GIL) overlap with parsing in
+    the consuming thread. Download errors are re-raised to the reader. The
+    thread stops once the reader or the underlying response is closed.
+    """
+    
+    def __init__(self, raw, chunk_size: int = CSV_READ_BUFFER_SIZE):
+        self._raw = raw
+        self._queue = queue.Queue(maxsize=PREFETCH_QUEUE_CHUNKS)
+        self._stopped = threading.Event()
+        self._buffer = memoryview(b'')
+        self._eof = False
+        threading.Thread(target=self._download, args=(chunk_size,), daemon=True).start()
+    
+    def _download(self, chunk_size: int):
+        try:
+            while not self._stopped.is_set():
+                chunk = self._raw.read(chunk_size)
+                if not self._put(chunk) or not chunk:
+                    return
+        except Exception as e:
+            self._put(e)
+    
+    def _put(self, item) -> bool:
+        """Queue an item, giving up if the reader goes away; True if queued"""
+        while not (self._stopped.is_set() or self._raw.closed):
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        if not self._buffer and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            self._eof = not item
+            self._buffer = memoryview(item)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+    
+    def close(self):
+        self._stopped.set()
+        super().close()
+
+class _RestaurantXMLTarget:
+    """XML parser target that collects FEHD restaurant records from start/end/data events
+    
+    No Element objects are built: each <restaurant> or <licence> becomes a
+    dict of its direct children's text as the parser streams through it.
+    """
+    
+    def __init__(self):
+        self.records = {'restaurant': [], 'licence': []}
+        self._depth = 0
+        self._record = None
+        self._record_depth = 0
+        self._field = None
+        self._text = []
+    
+    def start(self, tag, attrib):
+        self._depth += 1
+        if self._record is None:
+            if tag in self.records:
+                self._record = {'tag': tag}
+                self._record_depth = self._depth
+        elif self._depth == self._record_depth + 1 and tag in RESTAURANT_XML_FIELDS:
+            self._field = tag
+            self._text = []
+    
+    def data(self, text):
+        if self._field is not None and self._depth == self._record_depth + 1:
+            self._text.append(text)
+    
+    def end(self, tag):
+        if self._field is not None and self._depth == self._record_depth + 1:
+            text = ''.join(self._text)
+            if self._field in RESTAURANT_XML_SHARED_FIELDS:
+                text = sys.intern(text)
+            self._record[self._field] = text
+            self._field = None
+        elif self._record is not None and self._depth == self._record_depth:
+            self.records[self._record.pop('tag')].append(self._record)
+            self._record = None
+        self._depth -= 1
+    
+    def close(self):
+        # Restaurant elements take precedence, as with the old findall() fallback
+        return self.records['restaurant'] or self.records['licence']
+
 class HKGovDataService:
     """Service for fetching Hong Kong government open data"""
     
-    def __init__(self):
-        """Initialize HK government data service"""
+    def __init__(self, cache_path: Optional[str] = None):
+        """Initialize HK government data service
+        
+        Parsed responses are cached per source for GOV_CACHE_TTLS, in memory
+        and in a SQLite cache at cache_path (default GOV_CACHE_PATH or
+        hk_gov_data_cache.db in the temp dir) so restarts skip the download
+        and parse. Stale entries
+        are revalidated with a conditional GET; a 304 reuses the payload,
+        and an upstream failure serves the stale payload instead of nothing.
+        """
         self.base_url = "https://data.gov.hk"
-        self.timeout = 5  # Reduced timeout to fail faster
+        self.timeout = (3, 10)  # (connect, read) seconds - fail fast on unreachable hosts
+        self._session = self._create_session()  # Keep-alive connections shared by all fetches
+        self._cache = TTLCache(maxsize=len(GOV_CACHE_TTLS), ttl=max(GOV_CACHE_TTLS.values()))
+        self._disk_cache = DiskCache(cache_path or default_disk_cache_path('GOV_CACHE_PATH', 'hk_gov_data_cache.db'))
         self._api_available = True  # Track if APIs are working
         self.version = "2025-09-29-v2"  # Version identifier for debugging
         logger.info(f"HKGovDataService initialized - Version: {self.version}")
     
+    def close(self):
+        """Close the pooled connections held by the shared session"""
+        self._session.close()
+    
+    def __enter__(self) -> 'HKGovDataService':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def fetch_all(self, sources: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Run the fetchers for the given sources concurrently (all of GOV_DATA_SOURCES by default)
+        
+        Returns {source: result}; total latency is that of the slowest source.
+        """
+        sources = list(GOV_DATA_SOURCES if sources is None else sources)
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_FETCHES, len(sources) or 1)) as executor:
+            futures = {source: executor.submit(getattr(self, GOV_DATA_SOURCES[source])) for source in sources}
+            return {source: future.result() for source, future in futures.items()}
+    
+    async def afetch_all(self, sources: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Async fetch_all for event-loop callers: fetchers run in worker threads under asyncio.gather"""
+        sources = list(GOV_DATA_SOURCES if sources is None else sources)
+        results = await asyncio.gather(*(asyncio.to_thread(getattr(self, GOV_DATA_SOURCES[source])) for source in sources))
+        return dict(zip(sources, results))
+    
+    def invalidate(self, source: Optional[str] = None):
+        """Drop the cached payload for one source, or for all sources"""
+        for name in ([source] if source else GOV_CACHE_TTLS):
+            self._cache.pop(name)
+            self._disk_cache.delete(f"hkgov:{name}")
+    
+    def _get_entry(self, source: str) -> Optional[Dict]:
+        """Get the disk cache entry for a source, fresh or stale
+        
+        Entries are {'payload', 'fetched_at', 'validators'}, where validators
+        maps each URL to the conditional headers for its last 200 response.
+        """
+        entry = self._disk_cache.get(f"hkgov:{source}")
+        return entry if isinstance(entry, dict) and 'fetched_at' in entry else None
+    
+    def _get_cached(self, source: str) -> Any:
+        """Get a fresh parsed payload from memory, then disk; None on a miss or stale entry"""
+        payload = self._cache.get(source)
+        if payload is None:
+            entry = self._get_entry(source)
+            remaining = entry['fetched_at'] + GOV_CACHE_TTLS[source] - time.time() if entry else 0
+            if remaining > 0:
+                payload = entry['payload']
+                self._cache.set(source, payload, remaining)
+        return payload
+    
+    def _set_cached(self, source: str, payload: Any, responses: Optional[Dict[str, requests.Response]] = None):
+        """Cache a successfully parsed payload in memory and on disk
+        
+        responses maps each fetched URL to its response, whose validators are
+        kept on disk past the TTL for the next conditional GET.
+        """
+        self._store_entry(source, {
+            'payload': payload,
+            'fetched_at': time.time(),
+            'validators': {url: _validator_headers(response) for url, response in (responses or {}).items()}
+        })
+    
+    def _renew_cached(self, source: str, entry: Dict) -> Any:
+        """Restart the TTL of a stale entry the server confirmed unchanged (304); returns its payload"""
+        logger.info(f"{source} not modified upstream - reusing cached payload")
+        self._store_entry(source, dict(entry, fetched_at=time.time()))
+        return entry['payload']
+    
+    def _store_entry(self, source: str, entry: Dict):
+        """Write an entry to memory for the source TTL and to disk for the revalidation window"""
+        ttl = GOV_CACHE_TTLS[source]
+        self._cache.set(source, entry['payload'], ttl)
+        self._disk_cache.set(f"hkgov:{source}", entry, expire=ttl + GOV_REVALIDATE_TTL)
+    
+    def _get_stale(self, source: str, default: Any) -> Any:
+        """Serve the last successfully fetched payload, however stale, after an upstream failure"""
+        entry = self._get_entry(source)
+        if entry is None:
+            return default
+        age_hours = (time.time() - entry['fetched_at']) / 3600
+        logger.warning(f"Serving stale {source} data from {age_hours:.1f}h ago (served_stale=True)")
+        return entry['payload']
+    
+    def _conditional_headers(self, entry: Optional[Dict], url: str) -> Optional[Dict[str, str]]:
+        """If-None-Match/If-Modified-Since headers for url from a stale entry, if any"""
+        return (entry['validators'].get(url) or None) if entry else None
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled session that retries transient gateway errors"""
+        session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=MAX_CONCURRENT_FETCHES, pool_maxsize=2 * MAX_CONCURRENT_FETCHES, max_retries=retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def _http_get(self, url: str, stream: bool = False, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a URL over the shared session, raising for any 4xx/5xx status
+        
+        A 404 raises NotFoundError so callers can tell a withdrawn dataset
+        from a transient failure. A 304 to a conditional request is returned
+        as-is, with no body.
+        """
+        response = self._session.get(url, timeout=self.timeout, stream=stream, headers=headers)
+        try:
+            if response.status_code == 404:
+                raise NotFoundError(f"404 Not Found: {url}", response=response)
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+    
+    def _fetch_many(self, urls: List[str], stream: bool = False, headers: Optional[List[Optional[Dict[str, str]]]] = None) -> List[requests.Response]:
+        """GET several URLs concurrently via _http_get, in order
+        
+        headers optionally gives per-URL request headers. With stream=True
+        only the headers have arrived on return; callers must consume or
+        close each response. If any request fails, the others are closed
+        and the first error is raised.
+        """
+        headers = headers or [None] * len(urls)
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_FETCHES, len(urls) or 1)) as executor:
+            futures = [executor.submit(self._http_get, url, stream, url_headers) for url, url_headers in zip(urls, headers)]
+        
+        responses = []
+        error = None
+        for future in futures:
+            try:
+                responses.append(future.result())
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            for response in responses:
+                response.close()
+            raise error
+        return responses
+    
+    def _iter_csv_rows(self, response: requests.Response) -> Iterator[Dict]:
+        """Parse a streamed CSV response row by row as the body downloads"""
+        # Decode transfer compression in urllib3 and prefetch the body in a download
+        # thread; auto_close off so the reader sees a clean EOF instead of a closed file
+        response.raw.decode_content = True
+        response.raw.auto_close = False
+        text = io.TextIOWrapper(io.BufferedReader(_PrefetchReader(response.raw), CSV_READ_BUFFER_SIZE), encoding='utf-8-sig', errors='replace', newline='')
+        return csv.DictReader(text)
+    
     def get_major_attractions(self) -> List[Dict]:
         """Get major attractions from HK Tourism Board CSV"""
+        cached = self._get_cached('attractions')
+        if cached is not None:
+            return cached
+        
         if not self._api_available:
-            return []  # Skip if APIs are known to be down
+            return self._get_stale('attractions', [])  # Skip if APIs are known to be down
             
         try:
             # Use official HK Tourism Board CSV endpoint (Updated 2025-09-29)
             url = "https://www.tourism.gov.hk/datagovhk/major_attractions/major_attractions_info_en.csv"
             logger.info(f"Fetching attractions from NEW CSV endpoint: {url}")
-            response = requests.get(url, timeout=10)
+            entry = self._get_entry('attractions')
+            with self._http_get(url, stream=True, headers=self._conditional_headers(entry, url)) as response:
+                if response.status_code == 304:
+                    return self._renew_cached('attractions', entry)
+                # Rows are processed while the rest of the CSV is still downloading
+                processed = self._process_attractions_csv_data(self._iter_csv_rows(response))
             
-            if response.status_code == 200:
-                # Parse CSV data
-                import csv
-                import io
-                
-                csv_data = response.text
-                reader = csv.DictReader(io.StringIO(csv_data))
-                attractions = list(reader)
-                
-                logger.info(f"Retrieved {len(attractions)} major attractions from HK Tourism Board CSV")
-                self._api_available = True
-                return self._process_attractions_csv_data(attractions)
-            else:
-                if response.status_code == 404:
-                    self._api_available = False  # Mark as unavailable
-                logger.warning(f"Attractions CSV API returned status {response.status_code}")
-                return []
-                
+            logger.info(f"Retrieved {len(processed)} major attractions from HK Tourism Board CSV")
+            self._api_available = True
+            self._set_cached('attractions', processed, {url: response})
+            return processed
+            
+        except requests.HTTPError as e:
+            if isinstance(e, NotFoundError):
+                self._api_available = False  # Mark as unavailable
+            logger.warning(f"Attractions CSV API returned status {e.response.status_code}")
+            return self._get_stale('attractions', [])
         except Exception as e:
             self._api_available = False  # Mark as unavailable on network errors
             logger.warning(f"Could not fetch attractions CSV data: {str(e)}")
             logger.info("Falling back to mock attractions data for user experience")
-            return self._get_fallback_attractions()
+            return self._get_stale('attractions', None) or self._get_fallback_attractions()
     
     def get_hktb_events(self) -> List[Dict]:
         """Get events organized by Hong Kong Tourism Board"""
+        cached = self._get_cached('events')
+        if cached is not None:
+            return cached
+        
         if not self._api_available:
-            return []  # Skip if APIs are known to be down
+            return self._get_stale('events', [])  # Skip if APIs are known to be down
             
         try:
             # HKTB events API
             url = "https://data.gov.hk/en-data/api/get?id=hk-cstb-cstb_tc-tc-hktb-events&format=json"
-            response = requests.get(url, timeout=self.timeout)
+            entry = self._get_entry('events')
+            response = self._http_get(url, headers=self._conditional_headers(entry, url))
+            if response.status_code == 304:
+                return self._renew_cached('events', entry)
+            data = _json_loads(response.content)
+            logger.info(f"Retrieved {len(data)} HKTB events")
+            processed = self._process_events_data(data)
+            self._set_cached('events', processed, {url: response})
+            return processed
             
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"Retrieved {len(data)} HKTB events")
-                return self._process_events_data(data)
-            else:
-                if response.status_code == 404:
-                    logger.info("Events API not available (404) - using local data only")
-                else:
-                    logger.warning(f"Events API returned status {response.status_code}")
-                return []
-                
+        except NotFoundError:
+            logger.info("Events API not available (404) - using local data only")
+            return self._get_stale('events', [])
+        except requests.HTTPError as e:
+            logger.warning(f"Events API returned status {e.response.status_code}")
+            return self._get_stale('events', [])
         except Exception as e:
             logger.warning(f"Could not fetch events data: {str(e)}")
-            return []
+            return self._get_stale('events', [])
     
     def get_restaurant_licenses(self) -> List[Dict]:
         """Get licensed restaurants from FEHD XML"""
+        cached = self._get_cached('restaurants')
+        if cached is not None:
+            return cached
+        
         try:
             # Use official FEHD restaurant licenses XML endpoint
             url = "https://res.data.gov.hk/api/get-download-file?name=https%3A%2F%2Fwww.fehd.gov.hk%2Fenglish%2Flicensing%2Flicense%2Ftext%2FLP_Restaurants_EN.XML"
-            response = requests.get(url, timeout=10)
+            entry = self._get_entry('restaurants')
+            with self._http_get(url, stream=True, headers=self._conditional_headers(entry, url)) as response:
+                if response.status_code == 304:
+                    return self._renew_cached('restaurants', entry)
+                # Parse records as the XML downloads (in a prefetch thread) instead of
+                # building the whole tree
+                response.raw.decode_content = True
+                response.raw.auto_close = False
+                with _PrefetchReader(response.raw, XML_READ_CHUNK_SIZE) as source:
+                    restaurants = self._parse_restaurant_xml(source)
             
-            if response.status_code == 200:
-                # Parse XML data
-                import xml.etree.ElementTree as ET
-                
-                root = ET.fromstring(response.content)
-                restaurants = self._parse_restaurant_xml(root)
-                
-                logger.info(f"Retrieved {len(restaurants)} restaurant licenses from FEHD XML")
-                return restaurants
-            else:
-                logger.warning(f"Restaurant XML API returned status {response.status_code}")
-                return []
-                
+            logger.info(f"Retrieved {len(restaurants)} restaurant licenses from FEHD XML")
+            self._set_cached('restaurants', restaurants, {url: response})
+            return restaurants
+            
+        except requests.HTTPError as e:
+            logger.warning(f"Restaurant XML API returned status {e.response.status_code}")
+            return self._get_stale('restaurants', [])
         except Exception as e:
             logger.warning(f"Could not fetch restaurant XML data: {str(e)}")
-            return []
+            return self._get_stale('restaurants', [])
     
     def get_mtr_accessibility_info(self) -> Dict:
         """Get MTR routes and barrier-free facilities from official CSV"""
+        cached = self._get_cached('mtr')
+        if cached is not None:
+            return cached
+        
         try:
             # Get MTR lines and stations
             stations_url = "https://opendata.mtr.com.hk/data/mtr_lines_and_stations.csv"
             facilities_url = "https://opendata.mtr.com.hk/data/barrier_free_facilities.csv"
             
-            stations_response = requests.get(stations_url, timeout=10)
-            facilities_response = requests.get(facilities_url, timeout=10)
+            urls = [stations_url, facilities_url]
             
-            if stations_response.status_code == 200 and facilities_response.status_code == 200:
-                import csv
-                import io
-                
-                # Parse stations CSV
-                stations_reader = csv.DictReader(io.StringIO(stations_response.text))
-                stations = list(stations_reader)
-                
-                # Parse facilities CSV
-                facilities_reader = csv.DictReader(io.StringIO(facilities_response.text))
-                facilities = list(facilities_reader)
-                
-                logger.info(f"Retrieved {len(stations)} MTR stations and {len(facilities)} accessibility facilities")
-                return self._process_mtr_csv_data(stations, facilities)
-            else:
-                logger.warning(f"MTR CSV APIs returned status {stations_response.status_code}, {facilities_response.status_code}")
-                return {}
-                
+            # Both CSVs are needed; download them in parallel
+            entry = self._get_entry('mtr')
+            responses = self._fetch_many(urls, stream=True, headers=[self._conditional_headers(entry, url) for url in urls])
+            if all(response.status_code == 304 for response in responses):
+                return self._renew_cached('mtr', entry)
+            # Only one CSV changed - the other's body is still needed, so refetch it unconditionally
+            stations_response, facilities_response = [
+                self._refetch_not_modified(url, response, responses)
+                for url, response in zip(urls, responses)
+            ]
+            
+            with stations_response, facilities_response:
+                # Parse both CSVs straight from the response streams
+                processed = self._process_mtr_csv_data(
+                    self._iter_csv_rows(stations_response),
+                    self._iter_csv_rows(facilities_response)
+                )
+            
+            logger.info(f"Retrieved {len(processed.get('stations', {}))} MTR stations with accessibility facilities")
+            if processed:
+                self._set_cached('mtr', processed, {stations_url: stations_response, facilities_url: facilities_response})
+            return processed
+            
+        except requests.HTTPError as e:
+            logger.warning(f"MTR CSV API returned status {e.response.status_code}")
+            return self._get_stale('mtr', {})
         except Exception as e:
             logger.warning(f"Could not fetch MTR CSV data: {str(e)}")
-            return {}
+            return self._get_stale('mtr', {})
+    
+    def _refetch_not_modified(self, url: str, response: requests.Response, responses: List[requests.Response]) -> requests.Response:
+        """Replace a 304 response with an unconditional GET, closing the 304 first
+        
+        If the refetch fails, every response in responses is closed before
+        the error is raised.
+        """
+        if response.status_code != 304:
+            return response
+        response.close()
+        try:
+            return self._http_get(url, stream=True)
+        except Exception:
+            for other in responses:
+                other.close()
+            raise
     
     def get_accessible_facilities(self) -> List[Dict]:
         """Get accessible facilities from Hong Kong Rehabilitation Society XML"""
@@ -150,44 +631,37 @@ class HKGovDataService:
         logger.info("Skipping accessibility XML feeds - using comprehensive offline accessibility data")
         return []
     
-    def _process_attractions_csv_data(self, data: List[Dict]) -> List[Dict]:
+    def _process_attractions_csv_data(self, data: Iterable[Dict]) -> List[Dict]:
         """Process attractions CSV data into standardized format"""
         processed = []
+        coords = []
         
+        # DictReader rows are always dicts and every field is a .get(), so
+        # nothing here can raise per row
         for attraction in data:
-            try:
-                processed_attraction = {
-                    'id': f"hktb_{len(processed)}",
-                    'name': attraction.get('Attraction', attraction.get('Name (English)', 'Unknown Attraction')),
-                    'name_zh': attraction.get('Name (Traditional Chinese)', ''),
-                    'category': 'attraction',
-                    'description': attraction.get('Description', ''),
-                    'district': '',  # Not available in this CSV format
-                    'address': attraction.get('Address', ''),
-                    'latitude': None,  # Parse from coordinates field
-                    'longitude': None,  # Parse from coordinates field
-                    'phone': attraction.get('Telephone number', ''),
-                    'website': attraction.get('Website', ''),
-                    'opening_hours': '',
-                    'admission_fee': '',
-                    'accessibility_info': {},  # Will be enhanced with additional data
-                    'source': 'hktb_attractions_csv'
-                }
-                
-                # Parse coordinates if available
-                coords = attraction.get('Latitude and longitude coordinates', '')
-                if coords and ',' in coords:
-                    try:
-                        lat_str, lng_str = coords.split(',')
-                        processed_attraction['latitude'] = float(lat_str.strip())
-                        processed_attraction['longitude'] = float(lng_str.strip())
-                    except:
-                        pass
-                processed.append(processed_attraction)
-                
-            except Exception as e:
-                logger.warning(f"Error processing attraction CSV {attraction}: {str(e)}")
-                continue
+            processed.append({
+                'id': f"hktb_{len(processed)}",
+                'name': attraction.get('Attraction', attraction.get('Name (English)', 'Unknown Attraction')),
+                'name_zh': attraction.get('Name (Traditional Chinese)', ''),
+                'category': 'attraction',
+                'description': attraction.get('Description', ''),
+                'district': '',  # Not available in this CSV format
+                'address': attraction.get('Address', ''),
+                'latitude': None,  # Parse from coordinates field
+                'longitude': None,  # Parse from coordinates field
+                'phone': attraction.get('Telephone number', ''),
+                'website': attraction.get('Website', ''),
+                'opening_hours': '',
+                'admission_fee': '',
+                'accessibility_info': {},  # Will be enhanced with additional data
+                'source': 'hktb_attractions_csv'
+            })
+            coords.append(attraction.get('Latitude and longitude coordinates') or '')
+        
+        # Parse all coordinate pairs in one batch; rows without a valid pair keep None
+        parsed = _parse_coordinates(coords)
+        for index in np.flatnonzero(~np.isnan(parsed).any(axis=1)):
+            processed[index]['latitude'], processed[index]['longitude'] = parsed[index].tolist()
         
         return processed
 
@@ -197,23 +671,16 @@ class HKGovDataService:
         
         for attraction in data:
             try:
-                processed_attraction = {
-                    'id': f"hktb_{attraction.get('id', len(processed))}",
-                    'name': attraction.get('name_en', attraction.get('name', 'Unknown Attraction')),
-                    'name_zh': attraction.get('name_zh', ''),
-                    'category': 'attraction',
-                    'description': attraction.get('description_en', attraction.get('description', '')),
-                    'district': attraction.get('district_en', attraction.get('district', '')),
-                    'address': attraction.get('address_en', attraction.get('address', '')),
-                    'latitude': float(attraction.get('latitude', 0)) if attraction.get('latitude') else None,
-                    'longitude': float(attraction.get('longitude', 0)) if attraction.get('longitude') else None,
-                    'phone': attraction.get('phone', ''),
-                    'website': attraction.get('website', ''),
-                    'opening_hours': attraction.get('opening_hours', {}),
-                    'admission_fee': attraction.get('admission_fee', ''),
-                    'accessibility_info': attraction.get('accessibility', {}),
-                    'source': 'hktb_attractions'
-                }
+                processed_attraction = _map_fields(attraction, ATTRACTION_FIELDS)
+                processed_attraction.update(
+                    id=f"hktb_{attraction.get('id', len(processed))}",
+                    category='attraction',
+                    latitude=float(attraction['latitude']) if attraction.get('latitude') else None,
+                    longitude=float(attraction['longitude']) if attraction.get('longitude') else None,
+                    opening_hours=attraction.get('opening_hours', {}),
+                    accessibility_info=attraction.get('accessibility', {}),
+                    source='hktb_attractions'
+                )
                 processed.append(processed_attraction)
                 
             except Exception as e:
@@ -225,35 +692,34 @@ class HKGovDataService:
     def _process_events_data(self, data: List[Dict]) -> List[Dict]:
         """Process HKTB events data"""
         processed = []
-        current_date = datetime.now()
+        # ISO dates sort lexicographically, so past events are skipped with a
+        # string comparison; today's already started, as before
+        today = date.today().isoformat()
+        malformed = 0
         
         for event in data:
-            try:
-                # Only include future events
-                event_date = datetime.strptime(event.get('date', ''), '%Y-%m-%d') if event.get('date') else current_date
-                if event_date < current_date:
+            # Only include future events (undated ones are kept); the date is the
+            # only field that can fail, so only its check sits in a try
+            event_date = event.get('date')
+            if event_date:
+                try:
+                    if event_date <= today:
+                        continue
+                    date.fromisoformat(event_date)  # Reject malformed dates
+                except (TypeError, ValueError):
+                    malformed += 1
                     continue
-                
-                processed_event = {
-                    'id': f"hktb_event_{event.get('id', len(processed))}",
-                    'name': event.get('name_en', event.get('name', 'Unknown Event')),
-                    'name_zh': event.get('name_zh', ''),
-                    'category': 'event',
-                    'description': event.get('description_en', event.get('description', '')),
-                    'venue': event.get('venue_en', event.get('venue', '')),
-                    'district': event.get('district_en', event.get('district', '')),
-                    'date': event.get('date', ''),
-                    'time': event.get('time', ''),
-                    'admission': event.get('admission', 'Free'),
-                    'website': event.get('website', ''),
-                    'source': 'hktb_events'
-                }
-                processed.append(processed_event)
-                
-            except Exception as e:
-                logger.warning(f"Error processing event {event}: {str(e)}")
-                continue
+            
+            processed_event = _map_fields(event, EVENT_FIELDS)
+            processed_event.update(
+                id=f"hktb_event_{event.get('id', len(processed))}",
+                category='event',
+                source='hktb_events'
+            )
+            processed.append(processed_event)
         
+        if malformed:
+            logger.warning(f"Dropped {malformed} events with malformed dates")
         return processed
     
     def _process_restaurant_data(self, data: List[Dict]) -> List[Dict]:
@@ -262,17 +728,12 @@ class HKGovDataService:
         
         for restaurant in data:
             try:
-                processed_restaurant = {
-                    'id': f"fehd_{restaurant.get('licence_no', len(processed))}",
-                    'name': restaurant.get('name_en', restaurant.get('name', 'Unknown Restaurant')),
-                    'name_zh': restaurant.get('name_zh', ''),
-                    'category': 'restaurant',
-                    'district': restaurant.get('district_en', restaurant.get('district', '')),
-                    'address': restaurant.get('address_en', restaurant.get('address', '')),
-                    'licence_type': restaurant.get('licence_type', ''),
-                    'licence_no': restaurant.get('licence_no', ''),
-                    'source': 'fehd_licenses'
-                }
+                processed_restaurant = _map_fields(restaurant, RESTAURANT_FIELDS)
+                processed_restaurant.update(
+                    id=f"fehd_{restaurant.get('licence_no', len(processed))}",
+                    category='restaurant',
+                    source='fehd_licenses'
+                )
                 processed.append(processed_restaurant)
                 
             except Exception as e:
@@ -316,25 +777,14 @@ class HKGovDataService:
         
         for facility in data:
             try:
-                processed_facility = {
-                    'id': f"rehab_{facility.get('id', len(processed))}",
-                    'name': facility.get('name_en', facility.get('name', 'Unknown Facility')),
-                    'name_zh': facility.get('name_zh', ''),
-                    'category': facility.get('category', 'facility'),
-                    'district': facility.get('district_en', facility.get('district', '')),
-                    'address': facility.get('address_en', facility.get('address', '')),
-                    'latitude': float(facility.get('latitude', 0)) if facility.get('latitude') else None,
-                    'longitude': float(facility.get('longitude', 0)) if facility.get('longitude') else None,
-                    'accessibility_features': {
-                        'wheelchair_accessible': facility.get('wheelchair_accessible', False),
-                        'has_lift': facility.get('has_lift', False),
-                        'accessible_toilet': facility.get('accessible_toilet', False),
-                        'accessible_parking': facility.get('accessible_parking', False),
-                        'braille_signage': facility.get('braille_signage', False),
-                        'hearing_loop': facility.get('hearing_loop', False)
-                    },
-                    'source': 'rehab_society'
-                }
+                processed_facility = _map_fields(facility, FACILITY_FIELDS)
+                processed_facility.update(
+                    id=f"rehab_{facility.get('id', len(processed))}",
+                    latitude=float(facility['latitude']) if facility.get('latitude') else None,
+                    longitude=float(facility['longitude']) if facility.get('longitude') else None,
+                    accessibility_features={feature: facility.get(feature, False) for feature in FACILITY_FEATURES},
+                    source='rehab_society'
+                )
                 processed.append(processed_facility)
                 
             except Exception as e:
@@ -343,8 +793,15 @@ class HKGovDataService:
         
         return processed
     
+    def convert_many(self, rows: Iterable[Dict]) -> List[Venue]:
+        """Convert a batch of government data rows to Venues, dropping rows that fail to convert"""
+        return [venue for venue in map(self.convert_to_venue, rows) if venue is not None]
+    
     def convert_to_venue(self, gov_data: Dict) -> Optional[Venue]:
-        """Convert government data to Venue object"""
+        """Convert government data to Venue object
+        
+        Each call builds a new Venue, so callers can modify theirs freely.
+        """
         try:
             # Create location
             location = Location(
@@ -354,40 +811,27 @@ class HKGovDataService:
                 district=gov_data.get('district', '')
             )
             
-            # Create accessibility info
+            # Create accessibility info (all defaults when the row has none)
             accessibility_data = gov_data.get('accessibility_features', gov_data.get('accessibility_info', {}))
-            accessibility = AccessibilityInfo(
-                has_elevator=accessibility_data.get('has_lift', False),
-                wheelchair_accessible=accessibility_data.get('wheelchair_accessible', False),
-                accessible_toilets=accessibility_data.get('accessible_toilet', False),
-                step_free_access=accessibility_data.get('step_free_access', False),
-                parent_facilities=False,  # Not available in gov data
-                rest_areas=False,  # Not available in gov data
-                difficulty_level=1,  # Default
-                accessibility_notes=[]
-            )
+            if accessibility_data:
+                accessibility = AccessibilityInfo(
+                    has_elevator=accessibility_data.get('has_lift', False),
+                    wheelchair_accessible=accessibility_data.get('wheelchair_accessible', False),
+                    accessible_toilets=accessibility_data.get('accessible_toilet', False),
+                    step_free_access=accessibility_data.get('step_free_access', False),
+                    parent_facilities=False,  # Not available in gov data
+                    rest_areas=False,  # Not available in gov data
+                    difficulty_level=1,  # Default
+                    accessibility_notes=[]
+                )
+            else:
+                accessibility = AccessibilityInfo()
             
-            # Create dietary options (mostly for restaurants)
-            dietary_options = DietaryOption(
-                soft_meals=False,  # Need to enhance with additional data
-                vegetarian=False,
-                halal=False,
-                no_seafood=False,
-                allergy_friendly=False,
-                dietary_notes=[]
-            )
+            # Dietary options aren't in gov data yet - need to enhance with additional data
+            dietary_options = DietaryOption()
             
             # Determine category
-            category_mapping = {
-                'attraction': VenueCategory.ATTRACTION,
-                'restaurant': VenueCategory.RESTAURANT,
-                'event': VenueCategory.ATTRACTION,  # Events as attractions
-                'facility': VenueCategory.ATTRACTION,
-                'museum': VenueCategory.MUSEUM,
-                'park': VenueCategory.PARK
-            }
-            
-            category = category_mapping.get(gov_data.get('category', 'attraction'), VenueCategory.ATTRACTION)
+            category = VENUE_CATEGORY_MAP.get(gov_data.get('category', 'attraction'), VenueCategory.ATTRACTION)
             
             # Estimate cost range (since not provided in gov data)
             cost_range = self._estimate_cost_range(category, gov_data)
@@ -415,77 +859,56 @@ class HKGovDataService:
     
     def _estimate_cost_range(self, category: VenueCategory, data: Dict) -> Tuple[int, int]:
         """Estimate cost range based on venue type and available data"""
-        admission_fee = data.get('admission_fee', '').lower()
+        admission_fee = data.get('admission_fee', '')
         
         # Check if free
-        if 'free' in admission_fee or admission_fee == '':
+        if not admission_fee or FREE_ADMISSION_PATTERN.search(admission_fee):
             return (0, 0)
         
         # Default ranges by category
-        if category == VenueCategory.ATTRACTION:
-            return (20, 100)  # HKD
-        elif category == VenueCategory.MUSEUM:
-            return (10, 50)
-        elif category == VenueCategory.RESTAURANT:
-            return (50, 200)
-        elif category == VenueCategory.PARK:
-            return (0, 0)
-        else:
-            return (0, 50) 
-   
-    def _parse_restaurant_xml(self, root) -> List[Dict]:
-        """Parse FEHD restaurant XML data"""
+        return CATEGORY_COST_RANGES.get(category, (0, 50))
+    
+    def _parse_restaurant_xml(self, source) -> List[Dict]:
+        """Stream-parse FEHD restaurant XML from a file-like object
+        
+        Chunks are fed to a target parser (lxml when installed, else the
+        stdlib's expat parser), so records are built without an element tree.
+        Read and parse errors are raised rather than returning a truncated
+        list, so callers never cache a partial download.
+        """
         restaurants = []
+        if LXML_AVAILABLE:
+            parser = lxml_etree.XMLParser(target=_RestaurantXMLTarget(), huge_tree=True)
+        else:
+            parser = ET.XMLParser(target=_RestaurantXMLTarget())
+        for chunk in iter(lambda: source.read(XML_READ_CHUNK_SIZE), b''):
+            parser.feed(chunk)
+        records = parser.close()
         
-        try:
-            # Navigate XML structure - adjust based on actual XML format
-            for restaurant_elem in root.findall('.//restaurant') or root.findall('.//licence'):
-                try:
-                    restaurant = {
-                        'id': f"fehd_{len(restaurants)}",
-                        'name': self._get_xml_text(restaurant_elem, 'name') or self._get_xml_text(restaurant_elem, 'licensee_name'),
-                        'category': 'restaurant',
-                        'district': self._get_xml_text(restaurant_elem, 'district'),
-                        'address': self._get_xml_text(restaurant_elem, 'address'),
-                        'licence_type': self._get_xml_text(restaurant_elem, 'licence_type'),
-                        'licence_no': self._get_xml_text(restaurant_elem, 'licence_no'),
-                        'source': 'fehd_xml'
-                    }
-                    restaurants.append(restaurant)
-                except Exception as e:
-                    logger.warning(f"Error parsing restaurant XML element: {str(e)}")
-                    continue
-                    
-        except Exception as e:
-            logger.warning(f"Error parsing restaurant XML: {str(e)}")
+        for record in records:
+            restaurants.append({
+                'id': f"fehd_{len(restaurants)}",
+                'name': record.get('name') or record.get('licensee_name', ''),
+                'category': 'restaurant',
+                'district': record.get('district', ''),
+                'address': record.get('address', ''),
+                'licence_type': record.get('licence_type', ''),
+                'licence_no': record.get('licence_no', ''),
+                'source': 'fehd_xml'
+            })
         
         return restaurants
     
     def _parse_accessibility_xml(self, xml_content: bytes, facility_type: str) -> List[Dict]:
         """Parse accessibility XML data from Hong Kong Rehabilitation Society"""
-        facilities = []
-        
-        try:
-            import xml.etree.ElementTree as ET
-            
-            # Try to clean the XML content first
-            xml_string = xml_content.decode('utf-8', errors='ignore')
-            
-            # Skip this XML parsing for now due to malformed content
-            # The XML feed has issues at line 85, column 14
-            logger.info(f"Skipping {facility_type} XML parsing due to malformed content - using offline data instead")
-            return []
-            
-            # Original parsing code kept for future reference
-            # root = ET.fromstring(xml_content)
-            # Handle Atom feed format...
-                    
-        except Exception as e:
-            logger.debug(f"Accessibility XML parsing skipped for {facility_type}: {str(e)}")
-        
-        return facilities
+        # Skip this XML parsing for now due to malformed content
+        # The XML feed has issues at line 85, column 14; nothing is decoded or
+        # parsed until it is fixed (stream it like _parse_restaurant_xml then,
+        # matching '{http://www.w3.org/2005/Atom}entry' records)
+        logger.info(f"Skipping {facility_type} XML parsing due to malformed content - using offline data instead")
+        return []
     
-    def _process_mtr_csv_data(self, stations: List[Dict], facilities: List[Dict]) -> Dict:
+    def _process_mtr_csv_data(self, stations: Iterable[Dict], facilities: Iterable[Dict]) -> Dict:
         """Process MTR CSV data"""
         try:
             processed = {
@@ -511,8 +934,7 @@ class HKGovDataService:
             for facility in facilities:
                 station_code = facility.get('Station Code', '')
                 if station_code in processed['stations']:
-                    facility_type = facility.get('Facility Type', '').lower()
-                    if 'lift' in facility_type or 'elevator' in facility_type:
+                    if MTR_LIFT_PATTERN.search(facility.get('Facility Type', '')):
                         processed['stations'][station_code]['has_lift'] = True
                         processed['stations'][station_code]['wheelchair_accessible'] = True
                         processed['stations'][station_code]['step_free_access'] = True
@@ -524,20 +946,14 @@ class HKGovDataService:
             return {}
     
     def _get_xml_text(self, element, tag_name: str) -> str:
-        """Safely get text from XML element"""
-        try:
-            elem = element.find(tag_name)
-            return elem.text if elem is not None and elem.text else ''
-        except:
-            return ''
+        """Safely get text from XML element ('' if the tag is missing)"""
+        elem = element.find(tag_name)
+        return (elem.text or '') if elem is not None else ''
     
     def _get_xml_attr(self, element, tag_name: str, attr_name: str) -> str:
-        """Safely get attribute from XML element"""
-        try:
-            elem = element.find(tag_name)
-            return elem.get(attr_name) if elem is not None else ''
-        except:
-            return ''    
+        """Safely get attribute from XML element ('' if the tag or attribute is missing)"""
+        elem = element.find(tag_name)
+        return elem.get(attr_name, '') if elem is not None else ''
 
     def _get_fallback_attractions(self) -> List[Dict]:
         """Provide fallback attraction data when APIs are unavailable"""
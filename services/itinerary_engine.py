@@ -3,9 +3,9 @@ Itinerary Engine for Hong Kong Trip Planner
 AI-powered itinerary generation with accessibility focus
 """
 
-import random
 import logging
-from typing import List, Dict, Tuple
+import numpy as np
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from models import (
     UserPreferences, WeatherData, Itinerary, DayPlan, Venue, 
@@ -18,12 +18,30 @@ from services.venue_service import VenueService
 # Configure logging
 logger = logging.getLogger('services.itinerary_engine')
 
+# Hardest venue difficulty (1-5 scale) allowed for groups with seniors
+SENIOR_MAX_DIFFICULTY = 3
+
+def _venue_filter_columns(venues: List[Venue]) -> np.ndarray:
+    """Gather the fields venue filtering needs into a (9, N) array in one pass
+    
+    Rows: wheelchair, elevator, step-free, is-restaurant, soft meals,
+    vegetarian, is-outdoor, minimum cost, difficulty level.
+    """
+    rows = [
+        (v.accessibility.wheelchair_accessible, v.accessibility.has_elevator, v.accessibility.step_free_access,
+         v.category == VenueCategory.RESTAURANT, v.dietary_options.soft_meals, v.dietary_options.vegetarian,
+         v.weather_suitability == WeatherSuitability.OUTDOOR, v.cost_range[0], v.accessibility.difficulty_level)
+        for v in venues
+    ]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), 9).T
+
 class ItineraryEngine:
     """AI-powered engine for generating accessible itineraries"""
     
-    def __init__(self):
-        """Initialize itinerary engine"""
+    def __init__(self, seed: Optional[int] = None):
+        """Initialize itinerary engine (pass a seed for reproducible venue picks)"""
         self.venue_service = VenueService()
+        self._rng = np.random.default_rng(seed)
         self._facilities_service = None
         self.max_venues_per_day = 3
         self.max_walking_distance = 2.0  # km per day for seniors/families
@@ -98,48 +116,42 @@ class ItineraryEngine:
         # Get all suitable venues
         venues = self.venue_service.search_venues(criteria)
         
-        # Apply additional filtering
-        filtered_venues = []
-        for venue in venues:
-            if self._is_venue_suitable(venue, preferences, weather_data):
-                filtered_venues.append(venue)
-        
-        return filtered_venues
+        # Apply additional filtering as boolean masks over the venue columns
+        mask = self._suitable_venue_mask(_venue_filter_columns(venues), preferences, weather_data)
+        return [venues[i] for i in np.flatnonzero(mask)]
     
-    def _is_venue_suitable(self, venue: Venue, preferences: UserPreferences, weather_data: WeatherData) -> bool:
-        """Check if a venue is suitable for the user group"""
+    def _suitable_venue_mask(self, columns: np.ndarray, preferences: UserPreferences, weather_data: WeatherData) -> np.ndarray:
+        """Mask of venues suitable for the user group, from _venue_filter_columns output"""
+        wheelchair, elevator, step_free, restaurant, soft_meals, vegetarian, outdoor, cost_min, difficulty = columns
+        
+        # Check budget constraints
+        mask = cost_min <= preferences.budget_range[1]
         
         # Check accessibility requirements
         if preferences.requires_accessibility():
-            if 'wheelchair' in preferences.mobility_needs and not venue.accessibility.wheelchair_accessible:
-                return False
-            if 'elevator_only' in preferences.mobility_needs and not venue.accessibility.has_elevator:
-                return False
-            if 'avoid_stairs' in preferences.mobility_needs and not venue.accessibility.step_free_access:
-                return False
-        
-        # Check dietary requirements
+            if 'wheelchair' in preferences.mobility_needs:
+                mask &= wheelchair != 0
+            if 'elevator_only' in preferences.mobility_needs:
+                mask &= elevator != 0
+            if 'avoid_stairs' in preferences.mobility_needs:
+                mask &= step_free != 0
+        
+        # Check dietary requirements (restaurants only)
         if preferences.dietary_restrictions:
-            if 'soft_meals' in preferences.dietary_restrictions and venue.category == VenueCategory.RESTAURANT:
-                if not venue.dietary_options.soft_meals:
-                    return False
-            if 'vegetarian' in preferences.dietary_restrictions and venue.category == VenueCategory.RESTAURANT:
-                if not venue.dietary_options.vegetarian:
-                    return False
-        
-        # Check budget constraints
-        if venue.cost_range[0] > preferences.budget_range[1]:
-            return False
+            if 'soft_meals' in preferences.dietary_restrictions:
+                mask &= (restaurant == 0) | (soft_meals != 0)
+            if 'vegetarian' in preferences.dietary_restrictions:
+                mask &= (restaurant == 0) | (vegetarian != 0)
         
         # Check weather suitability
-        if not weather_data.is_suitable_for_outdoor and venue.weather_suitability == WeatherSuitability.OUTDOOR:
-            return False
+        if not weather_data.is_suitable_for_outdoor:
+            mask &= outdoor == 0
         
         # Check difficulty level for seniors
-        if preferences.has_seniors() and venue.accessibility.difficulty_level > 3:
-            return False
+        if preferences.has_seniors():
+            mask &= difficulty <= SENIOR_MAX_DIFFICULTY
         
-        return True
+        return mask
     
     def _generate_day_plan(self, day: int, preferences: UserPreferences, weather_data: WeatherData, 
                           available_venues: List[Venue], used_venues: set) -> DayPlan:
@@ -203,12 +215,9 @@ class ItineraryEngine:
             # Prefer restaurants with senior/child discounts if applicable
             if preferences.has_seniors() or preferences.has_children():
                 discounted = [r for r in restaurants if r.elderly_discount or r.child_discount]
-                if discounted:
-                    selected.append(random.choice(discounted))
-                else:
-                    selected.append(random.choice(restaurants))
+                selected.extend(self._sample_venues(discounted or restaurants, 1))
             else:
-                selected.append(random.choice(restaurants))
+                selected.extend(self._sample_venues(restaurants, 1))
         
         # Add attractions based on weather and preferences
         remaining_slots = self.max_venues_per_day - len(selected)
@@ -218,21 +227,20 @@ class ItineraryEngine:
             if weather_data.is_suitable_for_outdoor:
                 # Prefer outdoor venues in good weather
                 outdoor_venues = [v for v in attractions if v.weather_suitability in [WeatherSuitability.OUTDOOR, WeatherSuitability.MIXED]]
-                if outdoor_venues:
-                    selected.extend(random.sample(outdoor_venues, min(remaining_slots, len(outdoor_venues))))
-                else:
-                    selected.extend(random.sample(attractions, min(remaining_slots, len(attractions))))
+                selected.extend(self._sample_venues(outdoor_venues or attractions, remaining_slots))
             else:
                 # Prefer indoor venues in bad weather
                 indoor_venues = [v for v in attractions if v.weather_suitability == WeatherSuitability.INDOOR]
-                if indoor_venues:
-                    selected.extend(random.sample(indoor_venues, min(remaining_slots, len(indoor_venues))))
-                else:
-                    selected.extend(random.sample(attractions, min(remaining_slots, len(attractions))))
+                selected.extend(self._sample_venues(indoor_venues or attractions, remaining_slots))
         
         # Ensure we don't exceed max venues per day
         return selected[:self.max_venues_per_day]
     
+    def _sample_venues(self, venues: List[Venue], count: int) -> List[Venue]:
+        """Draw up to count distinct venues uniformly at random in one generator call"""
+        indices = self._rng.choice(len(venues), size=min(count, len(venues)), replace=False)
+        return [venues[i] for i in indices]
+    
     def _generate_transportation(self, venues: List[Venue], preferences: UserPreferences) -> List[TransportSegment]:
         """Generate transportation segments between venues"""
         transportation = []
@@ -341,22 +349,26 @@ class ItineraryEngine:
     
     def _calculate_total_cost(self, day_plans: List[DayPlan], preferences: UserPreferences) -> Tuple[float, CostBreakdown]:
         """Calculate total trip cost and breakdown"""
+        people = preferences.total_people()
         total_attractions = 0.0
         total_meals = 0.0
         total_transport = 0.0
         
+        # Sum per-person costs, then scale by group size once at the end
         for day_plan in day_plans:
             for venue in day_plan.venues:
-                avg_cost = (venue.cost_range[0] + venue.cost_range[1]) / 2 * preferences.total_people()
+                avg_cost = (venue.cost_range[0] + venue.cost_range[1]) / 2
                 
                 if venue.category == VenueCategory.RESTAURANT:
                     total_meals += avg_cost
                 else:
                     total_attractions += avg_cost
             
-            for transport in day_plan.transportation:
-                total_transport += transport.cost * preferences.total_people()
+            total_transport += sum(transport.cost for transport in day_plan.transportation)
         
+        total_attractions *= people
+        total_meals *= people
+        total_transport *= people
         total = total_attractions + total_meals + total_transport
         
         cost_breakdown = CostBreakdown(
@@ -364,7 +376,7 @@ class ItineraryEngine:
             meals=total_meals,
             transportation=total_transport,
             total=total,
-            cost_per_person=total / preferences.total_people()
+            cost_per_person=total / people
         )
         
         return total, cost_breakdown
@@ -378,24 +390,14 @@ class ItineraryEngine:
         if total_venues == 0:
             return 1.0
         
-        accessibility_points = 0
         max_points = total_venues * 5  # 5 points per venue max
         
-        for day_plan in day_plans:
-            for venue in day_plan.venues:
-                points = 0
-                if venue.accessibility.wheelchair_accessible:
-                    points += 1
-                if venue.accessibility.has_elevator:
-                    points += 1
-                if venue.accessibility.accessible_toilets:
-                    points += 1
-                if venue.accessibility.step_free_access:
-                    points += 1
-                if venue.accessibility.rest_areas:
-                    points += 1
-                
-                accessibility_points += points
+        # One point per accessibility feature present
+        accessibility_points = sum(
+            bool(access.wheelchair_accessible) + bool(access.has_elevator) + bool(access.accessible_toilets)
+            + bool(access.step_free_access) + bool(access.rest_areas)
+            for access in (venue.accessibility for day_plan in day_plans for venue in day_plan.venues)
+        )
         
         # Convert to 1-5 scale
         score = (accessibility_points / max_points) * 5
@@ -65,7 +65,7 @@ class LLMOrchestrator:
             )
         
         try:
-            start_time = time.time()
+            start_time = time.monotonic()
             
             # Prepare messages
             messages = [
@@ -91,7 +91,7 @@ class LLMOrchestrator:
                 timeout=self.config.timeout
             )
             
-            response_time = time.time() - start_time
+            response_time = time.monotonic() - start_time
             
             # Extract response content
             content = response.choices[0].message.content
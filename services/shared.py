@@ -0,0 +1,26 @@
+"""
+Shared service instances for the Streamlit app
+Each accessor builds its service once per process via st.cache_resource
+"""
+
+# Service modules are imported lazily inside the accessors to avoid circular
+# imports; this module is the only place services depend on streamlit.
+import streamlit as st
+
+@st.cache_resource(show_spinner=False)
+def get_venue_service():
+    """Get the shared VenueService instance"""
+    from services.venue_service import VenueService
+    return VenueService()
+
+@st.cache_resource(show_spinner=False)
+def get_weather_service():
+    """Get the shared WeatherService instance"""
+    from services.weather_service import WeatherService
+    return WeatherService()
+
+@st.cache_resource(show_spinner=False)
+def get_itinerary_engine():
+    """Get the shared ItineraryEngine instance"""
+    from services.itinerary_engine import ItineraryEngine
+    return ItineraryEngine()
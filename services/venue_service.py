@@ -6,6 +6,8 @@ Handles venue database operations and accessibility filtering
 from typing import List, Optional
 import sqlite3
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from models import Venue, VenueCategory, Location, AccessibilityInfo, DietaryOption, WeatherSuitability, SearchCriteria
 from database import get_db_connection
 from services.offline_data_service import OfflineDataService
@@ -15,6 +17,9 @@ import json
 # Configure logging
 logger = logging.getLogger('services.venue_service')
 
+# Government venue data is refetched at most every 6 hours
+GOV_DATA_REFRESH_SECONDS = 6 * 3600
+
 class VenueService:
     """Service for managing venue data and searches"""
     
@@ -155,22 +160,28 @@ class VenueService:
     def get_all_venues(self) -> List[Venue]:
         """Get all venues from offline data, database, government APIs, and AI"""
         try:
-            # Start with reliable offline data as foundation
-            offline_venues = self._get_offline_venues()
-            
-            # Add venues from local database
-            local_venues = []
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM venues")
-                rows = cursor.fetchall()
-                local_venues = [self._row_to_venue(row) for row in rows]
-            
-            # Enhance with government APIs (optional)
-            gov_venues = self._get_government_venues()
-            
-            # Add AI-generated venues (optional)
-            ai_venues = self._get_ai_venues()
+            # Government APIs and the LLM are both network-bound; start them
+            # first so their round-trips overlap with each other and local reads
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                gov_future = executor.submit(self._get_government_venues)
+                ai_future = executor.submit(self._get_ai_venues)
+                
+                # Start with reliable offline data as foundation
+                offline_venues = self._get_offline_venues()
+                
+                # Add venues from local database
+                local_venues = []
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT * FROM venues")
+                    rows = cursor.fetchall()
+                    local_venues = [self._row_to_venue(row) for row in rows]
+                
+                # Enhance with government APIs (optional)
+                gov_venues = gov_future.result()
+                
+                # Add AI-generated venues (optional)
+                ai_venues = ai_future.result()
             
             # Combine all sources
             all_venues = offline_venues + local_venues + gov_venues + ai_venues
@@ -316,13 +327,11 @@ class VenueService:
     def _get_government_venues(self) -> List[Venue]:
         """Get venues from Hong Kong government APIs"""
         try:
-            from datetime import datetime, timedelta
-            
             # Check if we need to refresh cache (refresh every 6 hours to reduce API calls)
-            now = datetime.now()
+            now = time.monotonic()
             if (self._gov_data_cache is None or 
                 self._last_update is None or 
-                now - self._last_update > timedelta(hours=6)):
+                now - self._last_update > GOV_DATA_REFRESH_SECONDS):
                 
                 logger.info("Refreshing government venue data...")
                 self._refresh_government_data()
@@ -341,28 +350,20 @@ class VenueService:
             
             hk_gov_service = self._get_hk_gov_service()
             if hk_gov_service:
+                # Fetch all three sources concurrently rather than one after another
+                gov_data = hk_gov_service.fetch_all(('attractions', 'events', 'facilities'))
+                
                 # Get major attractions (limit API calls)
-                attractions = hk_gov_service.get_major_attractions()
-                for attraction_data in attractions[:10]:  # Reduced limit
-                    venue = hk_gov_service.convert_to_venue(attraction_data)
-                    if venue:
-                        gov_venues.append(venue)
+                attractions = gov_data['attractions']
+                gov_venues.extend(hk_gov_service.convert_many(attractions[:10]))  # Reduced limit
                 
-                # Only try events and facilities if attractions worked
+                # Only use events and facilities if attractions worked
                 if attractions:
-                    # Get HKTB events (as temporary attractions)
-                    events = hk_gov_service.get_hktb_events()
-                    for event_data in events[:5]:  # Reduced limit
-                        venue = hk_gov_service.convert_to_venue(event_data)
-                        if venue:
-                            gov_venues.append(venue)
+                    # HKTB events (as temporary attractions)
+                    gov_venues.extend(hk_gov_service.convert_many(gov_data['events'][:5]))  # Reduced limit
                     
-                    # Get accessible facilities
-                    facilities = hk_gov_service.get_accessible_facilities()
-                    for facility_data in facilities[:5]:  # Reduced limit
-                        venue = hk_gov_service.convert_to_venue(facility_data)
-                        if venue:
-                            gov_venues.append(venue)
+                    # Accessible facilities
+                    gov_venues.extend(hk_gov_service.convert_many(gov_data['facilities'][:5]))  # Reduced limit
             
             self._gov_data_cache = gov_venues
             if gov_venues:
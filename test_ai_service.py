@@ -3,8 +3,16 @@
 Test script for AI venue service
 """
 
+import asyncio
+import json
 import logging
-from services.ai_venue_service import AIVenueService
+import os
+import tempfile
+import httpx
+import openai
+from models import WeatherSuitability
+import services.ai_venue_service as ai_venue_module
+from services.ai_venue_service import AIVenueService, SemanticVenueCache, _VenueStreamParser, _VENUE_RESPONSE_FORMAT
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -47,6 +55,233 @@ def test_ai_service_with_key():
     logger.info("ai_service = AIVenueService('your-api-key')")
     logger.info("venues = ai_service.generate_venues_for_preferences(preferences)")
 
+def test_streamed_venue_keeps_accessibility():
+    """Test a schema-conformant streamed venue converts with accessibility intact"""
+    logger.info("=== Testing Streamed Venue Round-Trip ===")
+    
+    from services.venue_service import VenueService
+    
+    venue_data = {
+        'name': 'Hong Kong Science Museum',
+        'category': 'museum',
+        'district': 'Tsim Sha Tsui',
+        'address': '2 Science Museum Road, Tsim Sha Tsui East',
+        'phone': '2732 3232',
+        'opening_hours': 'Mon, Wed-Fri 10:00-19:00, Sat-Sun 10:00-21:00 (Closed Tue)',
+        'description': 'Interactive exhibits with lifts to every floor.',
+        'cost_range': [20, 20],
+        'latitude': 22.3011,
+        'longitude': 114.1775,
+        'accessibility': {
+            'wheelchair_accessible': True,
+            'has_elevator': True,
+            'accessible_toilets': True,
+            'step_free_access': True,
+            'notes': ['Wheelchairs available at the entrance']
+        },
+        'dietary_options': {'soft_meals': True, 'vegetarian': False, 'halal': False, 'no_seafood': False, 'notes': []},
+        'weather_suitability': 'indoor',
+        'elderly_friendly': True
+    }
+    item_schema = _VENUE_RESPONSE_FORMAT['json_schema']['schema']['properties']['venues']['items']
+    assert sorted(venue_data) == sorted(item_schema['required'])
+    assert sorted(venue_data['accessibility']) == sorted(item_schema['properties']['accessibility']['required'])
+    
+    # Feed the structured response in small chunks, as the stream delivers it
+    response = json.dumps({'venues': [venue_data]})
+    ai_service = AIVenueService()
+    parser = _VenueStreamParser()
+    seen_names = set()
+    streamed = []
+    for i in range(0, len(response), 7):
+        streamed.extend(ai_service._iter_validated(parser.feed(response[i:i + 7]), seen_names))
+    assert len(streamed) == 1
+    
+    venue = VenueService()._convert_ai_data_to_venue(streamed[0])
+    assert venue.accessibility.wheelchair_accessible
+    assert venue.accessibility.has_elevator
+    assert venue.accessibility.step_free_access
+    assert venue.accessibility.difficulty_level == 1
+    assert venue.accessibility.accessibility_notes == ['Wheelchairs available at the entrance']
+    assert venue.dietary_options.soft_meals
+    assert venue.weather_suitability == WeatherSuitability.INDOOR
+    assert venue.location.address == venue_data['address']
+    assert venue.phone == venue_data['phone']
+    assert venue.opening_hours == venue_data['opening_hours']
+    
+    # Free-form JSON without an address gets one from its district
+    text_venue = {'name': 'Dim Sum Hall', 'category': 'restaurant', 'description': 'Step-free dining.', 'district': 'Central'}
+    assert list(ai_service._iter_validated([text_venue], set()))[0]['address'] == 'Central, Hong Kong'
+    assert venue.elderly_discount
+    logger.info("Streamed venue kept its accessibility flags")
+
+def test_fallback_venues_are_independent_copies():
+    """Test enhancing fallback venues doesn't leak into later fallback calls"""
+    logger.info("=== Testing Fallback Venue Copies ===")
+    
+    ai_service = AIVenueService()
+    venues = ai_service._get_fallback_venues()
+    original_notes = list(venues[0]['accessibility']['notes'])
+    ai_service._apply_enhancements(venues, {venues[0]['name']: {'description': 'Changed', 'tips': ['CHANGED']}})
+    assert venues[0]['accessibility']['notes'] == ['CHANGED']
+    
+    fresh = ai_service._get_fallback_venues()
+    assert fresh[0]['accessibility']['notes'] == original_notes
+    assert fresh[0]['description'] != 'Changed'
+    logger.info("Fallback venues are unaffected by enhancements")
+
+def test_semantic_cache_boundaries():
+    """Test near-miss lookups never cross a trip length or a full budget step"""
+    logger.info("=== Testing Semantic Cache Boundaries ===")
+    
+    def preferences(duration=2, budget_max=800):
+        return {
+            'family_composition': {'adults': 2, 'children': 0, 'seniors': 1},
+            'mobility_needs': ['wheelchair'],
+            'dietary_restrictions': [],
+            'budget_range': (200, budget_max),
+            'trip_duration': duration
+        }
+    
+    cache = SemanticVenueCache()
+    two_day_venues = [{'name': f"Venue {i}"} for i in range(6)]
+    cache.set(SemanticVenueCache.signature(preferences()), two_day_venues, preferences())
+    
+    # A 3-day trip asks for 9 venues, so the 2-day list of 6 must not be served
+    assert cache.get_similar(preferences(duration=3)) is None
+    # A full budget step (800 -> 600) sits on the radius and is excluded
+    assert cache.get_similar(preferences(budget_max=600)) is None
+    # Half a step away is still a near miss
+    assert cache.get_similar(preferences(budget_max=700)) == two_day_venues
+    logger.info("Semantic cache respects trip length and budget boundaries")
+
+def _bad_request(message):
+    """Build the error openai raises for a 400 response"""
+    request = httpx.Request('POST', 'http://localhost/v1/chat/completions')
+    return openai.BadRequestError(message, response=httpx.Response(400, request=request), body=None)
+
+class _FakeCompletions:
+    """Chat completions stub that fails with and/or without a response_format"""
+    
+    def __init__(self, schema_error=None, plain_error=None):
+        self.schema_error = schema_error
+        self.plain_error = plain_error
+        self.calls = []
+    
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        error = self.schema_error if 'response_format' in kwargs else self.plain_error
+        if error:
+            raise error
+        return 'plain reply'
+
+def _structured_service(completions):
+    """AIVenueService wired to a stubbed chat completions endpoint"""
+    ai_service = AIVenueService(api_key='test-key', supports_prompt_cache=False)
+    ai_service.client = type('Client', (), {'chat': type('Chat', (), {'completions': completions})()})()
+    return ai_service
+
+def test_structured_output_fallback():
+    """Test only schema rejections switch structured output off"""
+    logger.info("=== Testing Structured Output Fallback ===")
+    
+    system_messages = ({'role': 'system', 'content': 'static'}, {'role': 'system', 'content': 'dynamic'})
+    
+    # Endpoint names the schema: disable and answer without it
+    completions = _FakeCompletions(schema_error=_bad_request("Unsupported parameter: 'response_format'"))
+    ai_service = _structured_service(completions)
+    reply = asyncio.run(ai_service._create_structured_completion(system_messages, 'prompt', _VENUE_RESPONSE_FORMAT))
+    assert reply == 'plain reply'
+    assert ai_service.supports_structured_output is False
+    
+    # Vague error but the same request succeeds without the schema: disable
+    completions = _FakeCompletions(schema_error=_bad_request("Invalid request"))
+    ai_service = _structured_service(completions)
+    reply = asyncio.run(ai_service._create_structured_completion(system_messages, 'prompt', _VENUE_RESPONSE_FORMAT))
+    assert reply == 'plain reply'
+    assert ai_service.supports_structured_output is False
+    
+    # Context length fails either way: keep structured output and raise
+    context_error = _bad_request("This model's maximum context length is 8192 tokens")
+    completions = _FakeCompletions(schema_error=context_error, plain_error=context_error)
+    ai_service = _structured_service(completions)
+    try:
+        asyncio.run(ai_service._create_structured_completion(system_messages, 'prompt', _VENUE_RESPONSE_FORMAT))
+        raise AssertionError("context length error was swallowed")
+    except openai.BadRequestError:
+        pass
+    assert ai_service.supports_structured_output is True
+    assert len(completions.calls) == 2
+    logger.info("Structured output is only disabled for schema rejections")
+
+def _single_flight_service():
+    """AIVenueService with a fresh disk cache whose streamed completions are counted"""
+    ai_service = AIVenueService(api_key='test-key', disk_cache_path=os.path.join(tempfile.mkdtemp(), 'ai.db'))
+    ai_service.batch_window = 0
+    ai_service.calls = 0
+    
+    async def astream_venues(prompt):
+        ai_service.calls += 1
+        for name in ('Tea House', 'Harbour Walk'):
+            await asyncio.sleep(0.01)
+            yield {'id': name, 'name': name, 'category': 'attraction', 'description': 'Step-free.', 'accessibility': {'notes': []}}
+    
+    ai_service._astream_venues = astream_venues
+    return ai_service
+
+def test_single_flight_requests():
+    """Test identical requests share one completion without sharing venue objects"""
+    logger.info("=== Testing Single-Flight Venue Requests ===")
+    
+    preferences = {'family_composition': {'adults': 2, 'children': 0, 'seniors': 1}, 'trip_duration': 1}
+    
+    async def concurrent_requests():
+        ai_service = _single_flight_service()
+        first, second = await asyncio.gather(
+            ai_service.agenerate_venues_for_preferences(preferences),
+            ai_service.agenerate_venues_for_preferences(preferences)
+        )
+        first[0]['accessibility']['notes'].append('Changed')
+        cached = await ai_service.agenerate_venues_for_preferences(preferences)
+        return ai_service.calls, second, cached
+    
+    calls, second, cached = asyncio.run(concurrent_requests())
+    assert calls == 1
+    assert second[0]['accessibility']['notes'] == []
+    assert cached[0]['accessibility']['notes'] == []
+    
+    async def abandoned_leader():
+        ai_service = _single_flight_service()
+        leader = ai_service.aiter_venues_for_preferences(preferences)
+        await leader.__anext__()
+        follower = asyncio.ensure_future(ai_service.agenerate_venues_for_preferences(preferences))
+        await asyncio.sleep(0)
+        await leader.aclose()
+        venues = await asyncio.wait_for(follower, 5)
+        return ai_service.calls, venues
+    
+    # Closing the leader early releases the follower to make its own request
+    calls, venues = asyncio.run(abandoned_leader())
+    assert calls == 2 and len(venues) == 2
+    
+    async def stalled_leader():
+        ai_service = _single_flight_service()
+        leader = ai_service.aiter_venues_for_preferences(preferences)
+        await leader.__anext__()
+        venues = await asyncio.wait_for(ai_service.agenerate_venues_for_preferences(preferences), 5)
+        await leader.aclose()
+        return ai_service.calls, venues
+    
+    # A leader that is neither consumed nor closed only holds followers up to the timeout
+    timeout = ai_venue_module._INFLIGHT_WAIT_TIMEOUT
+    ai_venue_module._INFLIGHT_WAIT_TIMEOUT = 0.05
+    try:
+        calls, venues = asyncio.run(stalled_leader())
+    finally:
+        ai_venue_module._INFLIGHT_WAIT_TIMEOUT = timeout
+    assert calls == 2 and len(venues) == 2
+    logger.info("Single-flight requests are shared, copied and never left hanging")
+
 def test_venue_service_integration():
     """Test integration with venue service"""
     logger.info("=== Testing Venue Service Integration ===")
@@ -76,6 +311,11 @@ def main():
     """Run all tests"""
     test_ai_service_without_key()
     test_ai_service_with_key()
+    test_streamed_venue_keeps_accessibility()
+    test_fallback_venues_are_independent_copies()
+    test_semantic_cache_boundaries()
+    test_structured_output_fallback()
+    test_single_flight_requests()
     test_venue_service_integration()
 
 if __name__ == "__main__":
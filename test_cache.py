@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for service caching utilities
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from services.cache import TTLCache, DiskCache, create_cache, default_disk_cache_path, CACHE_PRESETS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('test_cache')
+
+def test_lru_eviction():
+    """Least recently used entries are evicted beyond maxsize"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache.get('a')  # 'b' is now least recently used
+    cache['c'] = 3
+
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    logger.info("✅ LRU eviction works")
+
+def test_ttl_expiry():
+    """Expired entries are not returned and are dropped"""
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache['a'] = 1
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    logger.info("✅ TTL expiry works")
+
+def test_per_entry_ttl():
+    """set() can override the cache lifetime for a single entry"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('short', 1, ttl=0)
+    cache.set('long', 2)
+
+    assert cache.get('short') is None
+    assert cache.pop('long') == 2
+    assert len(cache) == 0
+    logger.info("✅ Per-entry TTL works")
+
+def test_contains_stored_none():
+    """A live entry holding None still counts as present"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache['none'] = None
+
+    assert 'none' in cache
+    assert 'missing' not in cache
+    logger.info("✅ Stored None is present")
+
+def test_concurrent_access():
+    """Threads sharing one cache never trip over each other's evictions"""
+    cache = TTLCache(maxsize=50, ttl=0.001)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(2000):
+                key = (offset + i) % 80
+                cache.set(key, i)
+                cache.get(key)
+                key in cache
+                len(cache)
+                cache.pop((key + 1) % 80)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors
+    assert len(cache) <= cache.maxsize
+    logger.info("✅ Concurrent access is safe")
+
+def test_presets():
+    """Named presets configure size and lifetime"""
+    for profile, settings in CACHE_PRESETS.items():
+        cache = create_cache(profile)
+        assert cache.maxsize == settings['maxsize']
+        assert cache.ttl == settings['ttl']
+
+    assert create_cache('conservative', ttl=10).ttl == 10
+    assert create_cache('unknown').maxsize == CACHE_PRESETS['default']['maxsize']
+    logger.info("✅ Cache presets work")
+
+def test_disk_cache():
+    """Disk entries persist across instances and respect expiry"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.db')
+        DiskCache(path).set('venues', [{'name': 'Victoria Peak'}])
+        DiskCache(path).set('stale', [1], expire=0)
+        DiskCache(path).set('deleted', [2])
+        DiskCache(path).delete('deleted')
+
+        cache = DiskCache(path)
+        assert cache.get('venues') == [{'name': 'Victoria Peak'}]
+        assert cache.get('stale') is None
+        assert len(cache) == 1
+    logger.info("✅ Disk cache works")
+
+def test_disk_cache_paths():
+    """Each service resolves its own cache file from its own env var"""
+    os.environ['TEST_CACHE_PATH'] = '/tmp/custom_cache.db'
+    try:
+        assert default_disk_cache_path('TEST_CACHE_PATH', 'x.db') == '/tmp/custom_cache.db'
+    finally:
+        del os.environ['TEST_CACHE_PATH']
+    assert default_disk_cache_path('TEST_CACHE_PATH', 'x.db') == os.path.join(tempfile.gettempdir(), 'x.db')
+    logger.info("✅ Disk cache paths resolve per service")
+
+def main():
+    """Run all cache tests"""
+    logger.info("=== TESTING CACHE UTILITIES ===")
+
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_per_entry_ttl()
+    test_contains_stored_none()
+    test_concurrent_access()
+    test_presets()
+    test_disk_cache()
+    test_disk_cache_paths()
+
+    logger.info("=== CACHE TESTING COMPLETE ===")
+
+if __name__ == "__main__":
+    main()
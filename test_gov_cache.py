@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Test script for government data caching and streaming, against a mocked session
+"""
+
+import io
+import logging
+import os
+import tempfile
+import time
+import requests
+from urllib3.response import HTTPResponse
+from services.hk_gov_data_service import (
+    HKGovDataService, GOV_CACHE_TTLS, GOV_REVALIDATE_TTL, _PrefetchReader, _RestaurantXMLTarget
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('test_gov_cache')
+
+ATTRACTIONS_URL = "https://www.tourism.gov.hk/datagovhk/major_attractions/major_attractions_info_en.csv"
+MTR_STATIONS_URL = "https://opendata.mtr.com.hk/data/mtr_lines_and_stations.csv"
+MTR_FACILITIES_URL = "https://opendata.mtr.com.hk/data/barrier_free_facilities.csv"
+RESTAURANT_URL = "https://res.data.gov.hk/api/get-download-file?name=https%3A%2F%2Fwww.fehd.gov.hk%2Fenglish%2Flicensing%2Flicense%2Ftext%2FLP_Restaurants_EN.XML"
+
+RESTAURANT_XML = (
+    b'<?xml version="1.0" encoding="UTF-8"?><DATA>'
+    b'<restaurant><name>Tea House</name><district>Central</district><address>1 Queen St</address></restaurant>'
+    b'<restaurant><name>Noodle Bar</name><district>Wan Chai</district><address>2 Hennessy Rd</address></restaurant>'
+    b'</DATA>'
+)
+
+class _Body(io.BytesIO):
+    """Response body that raises error once its bytes run out, like a dropped connection"""
+
+    def __init__(self, data: bytes, error: Exception = None):
+        super().__init__(data)
+        self.error = error
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        if not chunk and self.error is not None:
+            raise self.error
+        return chunk
+
+def _response(url: str, status: int = 200, body: bytes = b'', headers: dict = None, error: Exception = None) -> requests.Response:
+    """Build a streamed requests.Response over an in-memory body"""
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    response.raw = HTTPResponse(body=_Body(body, error), headers=headers, status=status, preload_content=False)
+    return response
+
+class _FakeSession:
+    """Session stub answering each URL from a list of canned responses, in order"""
+
+    def __init__(self, routes: dict):
+        self.routes = {url: list(responses) for url, responses in routes.items()}
+        self.calls = []
+
+    def get(self, url, timeout=None, stream=False, headers=None):
+        self.calls.append((url, headers))
+        return self.routes[url].pop(0)
+
+    def close(self):
+        pass
+
+def _service(routes: dict) -> HKGovDataService:
+    """HKGovDataService over a fresh disk cache and a mocked session"""
+    service = HKGovDataService(cache_path=os.path.join(tempfile.mkdtemp(), 'gov.db'))
+    service._session = _FakeSession(routes)
+    return service
+
+def _store_stale(service: HKGovDataService, source: str, payload, validators: dict = None):
+    """Put an entry past its TTL (but inside the revalidation window) on disk"""
+    service._disk_cache.set(f"hkgov:{source}", {
+        'payload': payload,
+        'fetched_at': time.time() - GOV_CACHE_TTLS[source] - 60,
+        'validators': validators or {}
+    }, expire=GOV_REVALIDATE_TTL)
+
+def test_truncated_restaurant_stream():
+    """A download that drops mid-record serves the stale payload and caches nothing"""
+    url = RESTAURANT_URL
+    truncated = RESTAURANT_XML[:RESTAURANT_XML.index(b'<restaurant><name>Noodle')]
+
+    service = _service({url: [_response(url, body=truncated, headers={'ETag': '"v2"'}, error=ConnectionError("reset"))]})
+    stale = [{'id': 'fehd_0', 'name': 'Old Tea House'}]
+    _store_stale(service, 'restaurants', stale, {url: {'If-None-Match': '"v1"'}})
+
+    assert service.get_restaurant_licenses() == stale
+    # The stale entry and its validators are untouched, so a later 304 can't revive a partial list
+    assert service._get_entry('restaurants')['validators'] == {url: {'If-None-Match': '"v1"'}}
+    assert service._get_cached('restaurants') is None
+
+    # Truncated XML with no network error is a parse error, handled the same way
+    service = _service({url: [_response(url, body=truncated)]})
+    assert service.get_restaurant_licenses() == []
+    assert service._get_entry('restaurants') is None
+    logger.info("✅ Truncated restaurant downloads are never cached")
+
+def test_converted_venues_are_independent():
+    """Each conversion builds its own Venue, even for rows sharing an id"""
+    service = _service({})
+    csv_row = {'id': 'hktb_0', 'name': 'Peak Tram', 'category': 'attraction', 'source': 'hktb_attractions_csv',
+               'accessibility_info': {'has_lift': True}}
+    json_row = {'id': 'hktb_0', 'name': 'Star Ferry', 'category': 'attraction', 'source': 'hktb_attractions'}
+
+    first, second = service.convert_many([csv_row, csv_row])
+    assert first is not second
+    first.accessibility.accessibility_notes.append('Changed')
+    first.location.district = 'Changed'
+    assert second.accessibility.accessibility_notes == []
+    assert second.location.district == ''
+
+    # Rows without accessibility data get their own default info and dietary options
+    first, second = service.convert_many([json_row, json_row])
+    first.accessibility.accessibility_notes.append('Changed')
+    first.dietary_options.dietary_notes.append('Changed')
+    assert second.accessibility.accessibility_notes == []
+    assert second.dietary_options.dietary_notes == []
+
+    # Ids collide across sources; each row still converts to its own venue
+    assert service.convert_to_venue(json_row).name == 'Star Ferry'
+    logger.info("✅ Converted venues are independent")
+
+def test_conditional_get_renewal():
+    """Stale entries are revalidated with their validators, and a 304 renews them"""
+    stale = [{'id': 'hktb_0', 'name': 'Peak Tram'}]
+    service = _service({ATTRACTIONS_URL: [_response(ATTRACTIONS_URL, 304)]})
+    _store_stale(service, 'attractions', stale, {ATTRACTIONS_URL: {'If-None-Match': '"v1"'}})
+
+    assert service.get_major_attractions() == stale
+    assert service._session.calls == [(ATTRACTIONS_URL, {'If-None-Match': '"v1"'})]
+    # The TTL restarts, so the next call is a cache hit with no request
+    assert service._get_cached('attractions') == stale
+    assert service.get_major_attractions() == stale
+    assert len(service._session.calls) == 1
+
+    # A 200 replaces the payload and records the new validators
+    body = b'Attraction,Address\r\nStar Ferry,Central Pier 7\r\n'
+    service = _service({ATTRACTIONS_URL: [_response(ATTRACTIONS_URL, body=body, headers={'ETag': '"v2"', 'Last-Modified': 'Mon, 05 Oct 2026 00:00:00 GMT'})]})
+    _store_stale(service, 'attractions', stale, {ATTRACTIONS_URL: {'If-None-Match': '"v1"'}})
+    attractions = service.get_major_attractions()
+    assert [attraction['name'] for attraction in attractions] == ['Star Ferry']
+    assert service._get_entry('attractions')['validators'] == {
+        ATTRACTIONS_URL: {'If-None-Match': '"v2"', 'If-Modified-Since': 'Mon, 05 Oct 2026 00:00:00 GMT'}
+    }
+    logger.info("✅ Conditional GET renews unchanged payloads")
+
+def test_mtr_partial_not_modified():
+    """When only one MTR CSV is unchanged, its 304 is closed and the CSV refetched"""
+    stations = b'Station Code,Station Name (English),Line\r\nADM,Admiralty,ISL\r\n'
+    facilities = b'Station Code,Facility Type\r\nADM,Lift\r\n'
+    not_modified = _response(MTR_STATIONS_URL, 304)
+    service = _service({
+        MTR_STATIONS_URL: [not_modified, _response(MTR_STATIONS_URL, body=stations)],
+        MTR_FACILITIES_URL: [_response(MTR_FACILITIES_URL, body=facilities)]
+    })
+    _store_stale(service, 'mtr', {'stations': {}}, {MTR_STATIONS_URL: {'If-None-Match': '"s1"'}})
+
+    mtr = service.get_mtr_accessibility_info()
+    assert mtr['stations']['ADM']['has_lift']
+    assert not_modified.raw.closed
+    assert [url for url, headers in service._session.calls].count(MTR_STATIONS_URL) == 2
+    logger.info("✅ Partial MTR 304 is closed and refetched")
+
+def test_stale_fallback():
+    """Upstream failures serve the last payload, however stale, or the default"""
+    stale = [{'id': 'hktb_event_1', 'name': 'Lantern Festival'}]
+    events_url = "https://data.gov.hk/en-data/api/get?id=hk-cstb-cstb_tc-tc-hktb-events&format=json"
+    service = _service({events_url: [_response(events_url, 500), _response(events_url, 404)]})
+    _store_stale(service, 'events', stale)
+
+    assert service.get_hktb_events() == stale
+    assert service.get_hktb_events() == stale
+
+    service = _service({events_url: [_response(events_url, 500)]})
+    assert service.get_hktb_events() == []
+    logger.info("✅ Stale payloads are served when upstream fails")
+
+def test_prefetch_reader():
+    """The prefetch thread delivers the whole body in order and re-raises download errors"""
+    body = bytes(range(256)) * 1000
+    reader = _PrefetchReader(_Body(body), chunk_size=1000)
+    assert io.BufferedReader(reader, 4096).read() == body
+    reader.close()
+
+    reader = _PrefetchReader(_Body(b'partial', ConnectionError("reset")), chunk_size=4)
+    try:
+        reader.read()
+        raise AssertionError("download error was swallowed")
+    except ConnectionError:
+        pass
+    logger.info("✅ Prefetch reader streams bodies and surfaces errors")
+
+def test_restaurant_xml_target():
+    """Records come from direct children only, with <licence> used when there are no <restaurant> elements"""
+    service = _service({})
+    restaurants = service._parse_restaurant_xml(io.BytesIO(RESTAURANT_XML))
+    assert [(r['name'], r['district'], r['address']) for r in restaurants] == [
+        ('Tea House', 'Central', '1 Queen St'),
+        ('Noodle Bar', 'Wan Chai', '2 Hennessy Rd')
+    ]
+
+    target = _RestaurantXMLTarget()
+    for event, tag, text in (
+        ('start', 'licence', None), ('start', 'licensee_name', None), ('data', None, 'Lee Kee'),
+        ('end', 'licensee_name', None), ('start', 'extra', None), ('start', 'name', None),
+        ('data', None, 'Nested'), ('end', 'name', None), ('end', 'extra', None), ('end', 'licence', None)
+    ):
+        if event == 'start':
+            target.start(tag, {})
+        elif event == 'data':
+            target.data(text)
+        else:
+            target.end(tag)
+    assert target.close() == [{'licensee_name': 'Lee Kee'}]
+    logger.info("✅ Restaurant XML target collects flat records")
+
+def main():
+    """Run all government data cache tests"""
+    logger.info("=== TESTING GOVERNMENT DATA CACHE ===")
+
+    test_truncated_restaurant_stream()
+    test_converted_venues_are_independent()
+    test_conditional_get_renewal()
+    test_mtr_partial_not_modified()
+    test_stale_fallback()
+    test_prefetch_reader()
+    test_restaurant_xml_target()
+
+    logger.info("=== GOVERNMENT DATA CACHE TESTING COMPLETE ===")
+
+if __name__ == "__main__":
+    main()